@@ -1,12 +1,18 @@
 import json
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import uvicorn
+import asyncio
 
 import time
 
 import tmlib
+import category
+import datafile
+import budgets
+import timeline
+import views
+import heatmap
+import profiler
+import integrity
+import report_cache
 
 
 import threading
@@ -14,14 +20,19 @@ import threading
 import logging as lg
 
 import os
+import secrets
 import datetime as dt
+from collections import deque
 
 
+# 日数据文件暂时无法读取（如被占用）时的读取次数
+LOAD_RETRIES = 3
+
 
 
 
 class timeManagerBackend():
-    def __init__(self,logger:lg.Logger=None,auto_save=False,auto_save_query=0,data_path='./data'):
+    def __init__(self,logger:lg.Logger=None,auto_save=False,auto_save_query=0,data_path='./data',category_rules=None,budget_rules=None,enable_api=True,debug_token=None):
 
 
 
@@ -30,52 +41,64 @@ class timeManagerBackend():
         self.logger=logger
         self.data_path=data_path
         self.auto_save=auto_save
+        self.enable_api=enable_api
+        # 配置文件中的令牌可能是数字等非字符串，统一转换为字符串
+        self.debug_token=str(debug_token) if debug_token else None
+        self.profile_lock=threading.Lock()
+        self.save_lock=threading.Lock()
 
         if not self.logger:
             self.logger_init()
-        self.app = FastAPI()
-        # 添加CORS中间件以允许跨域请求
-        self.app.add_middleware(
-            CORSMiddleware,
-            allow_origins=["*"],
-            allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
-        )
-
         self.logger.info("backend initializing...")
-        self.__setup_routes()
+
+        # 应用分类：规则只编译一次，分类结果按应用记忆化
+        self.category_rules = category.parse_rules(category_rules)
+        self.category_matcher = category.CategoryMatcher(self.category_rules)
+        self.category_totals = {}
+        # 重分类与完整性检查都会重写分类汇总，共用一个后台线程，同一时间只运行一个
+        self.rollup_thread = None
+        self.reclassify_status = {"running": False, "done": 0, "total": 0, "report": None}
+        self.integrity_status = {"running": False, "done": 0, "total": 0, "report": None}
+
+        # 按用时排序的应用排行，随计时增量维护
+        self.ranking = views.RankedIndex()
+
+        # 每个应用按 15 分钟时段计数；保存时编码进日数据文件的 slots 字段
+        self.slot_data = {}
+        self.slot_index = 0
+        self.slot_end = 0.0
+
+        # 报表缓存：已结束的日期以文件签名为版本，今天以 data_version 为版本（今天的数据每变化一次加一）
+        self.report_cache = report_cache.ReportCache()
+        self.data_version = 0
+
+        # 预算事件：保留最近的事件供 /events 推送，并通知已注册的监听者（如托盘）
+        self.events = deque(maxlen=200)
+        self.event_seq = 0
+        self.event_listeners = []
+        self.budget_engine = budgets.BudgetEngine(budgets.parse_rules(budget_rules), self._emit_event)
+
+        # API 可选：无界面的守护进程不需要时不导入 fastapi/uvicorn
+        self.app = None
+        if self.enable_api:
+            self.__init_api()
         self.stop = False
 
 
-        if os.path.exists(self.data_path+'/'+ str(dt.datetime.today().strftime("%Y-%m-%d")) + ".json"):
-            with open(self.data_path+'/'+ str(dt.datetime.today().strftime("%Y-%m-%d")) + ".json",'r',encoding='utf-8') as f:
-                file_str=f.read()
-            try:
-                loaded_data = json.loads(file_str)
-                # 转换旧数据格式到新格式
-                self.main_data = {}
-                for key, value in loaded_data.items():
-                    if 'totalTime' in value and 'lastTime' in value:
-                        # 已经是新格式，直接使用
-                        self.main_data[key] = value
-                    elif 'total_time' in value and 'last_time' in value:
-                        # 旧格式，转换为新格式
-                        self.main_data[key] = {
-                            'totalTime': value['total_time'],
-                            'lastTime': value['last_time']
-                        }
-                    else:
-                        # 未知格式，使用默认值
-                        self.main_data[key] = {'totalTime': 0, 'lastTime': 0.0}
-            except:
-                self.main_data = {}
-        else:
-            self.main_data = {}
+        # main_data 所属的日期，只在计时线程跨天切换时改变；保存时写入这一天的文件
+        self.current_date = dt.datetime.today().date()
+        self.main_data = self._load_day_data(self.current_date)
+        self._rebuild_day_indexes()
+        self._load_budget_usage(self.current_date)
+
+        # 前台会话时间线；session 为当前未结束的会话 [开始时间, 最后确认时间, exe路径, 窗口标题]
+        self.timeline = timeline.TimelineStore(self.data_path, self.current_date, writable=True)
+        self.session = None
 
-        self.main_loop_thread = threading.Thread(target=self.main_loop,daemon=True)
-        self.backend_thread=threading.Thread(target=self.run_backend,daemon=True)
-        self.auto_save_thread=threading.Thread(target=self.auto_save_,daemon=True)
+        # 线程名供采样分析器筛选
+        self.main_loop_thread = threading.Thread(target=self.main_loop,name="main_loop",daemon=True)
+        self.backend_thread=threading.Thread(target=self.run_backend,name="backend",daemon=True)
+        self.auto_save_thread=threading.Thread(target=self.auto_save_,name="auto_save",daemon=True)
         
 
     def logger_init(self):
@@ -111,12 +134,84 @@ class timeManagerBackend():
         self.logger.addHandler(console_handler)
         
         self.logger.info("Started")
+    def __init_api(self):
+        from fastapi import FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+
+        if not self.debug_token:
+            # 未配置时生成随机令牌，写入数据目录，只有能访问本机文件的用户才能使用调试接口
+            self.debug_token = secrets.token_urlsafe(24)
+            os.makedirs(self.data_path, exist_ok=True)
+            with open(os.path.join(self.data_path, 'debug_token'), 'w', encoding='utf-8') as f:
+                f.write(self.debug_token)
+
+        self.app = FastAPI()
+        # 添加CORS中间件以允许跨域请求
+        self.app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+        self.__setup_routes()
+
     def __setup_routes(self):
+        from fastapi import HTTPException, Header
+        from fastapi.responses import FileResponse, StreamingResponse
+
         # 路由
         @self.app.get("/")
         def home():
             return self.main_data
 
+        @self.app.get("/view/top")
+        def view_top(limit: int = 20, offset: int = 0, q: str = None, category: str = None):
+            """
+            按用时降序分页返回今天的应用
+
+            q 按 exe 路径（不区分大小写）过滤，category 按分类过滤；
+            时间已格式化，前端无需再排序或计算合计
+            """
+            limit = max(1, min(limit, 200))
+            offset = max(0, offset)
+            data = self.main_data
+            predicate = None
+            if q or category:
+                needle = q.lower() if q else None
+
+                def predicate(exe_path):
+                    if needle and needle not in exe_path.lower():
+                        return False
+                    return not category or data.get(exe_path, {}).get('category') == category
+
+            keys, has_more = self.ranking.page(offset, limit, predicate)
+            items = []
+            for rank, exe_path in enumerate(keys, offset + 1):
+                value = data.get(exe_path)
+                if value is None:
+                    # 跨天切换时排行尚未重建
+                    continue
+                items.append({
+                    "rank": rank,
+                    "exe": exe_path,
+                    "name": views.app_name(exe_path),
+                    "category": value.get('category'),
+                    "iconPath": value.get('iconPath'),
+                    "totalTime": value['totalTime'],
+                    "totalTimeText": views.format_time(value['totalTime']),
+                    "lastTime": value['lastTime'],
+                })
+            day_total = sum(self.category_totals.values())
+            return {
+                "items": items,
+                "offset": offset,
+                "hasMore": has_more,
+                "count": len(self.ranking) if predicate is None else None,
+                "dayTotal": day_total,
+                "dayTotalText": views.format_time(day_total),
+            }
+
         @self.app.get("/get_week_data")
         def get_week_data():
             """获取过去7天（包括今天）的所有数据"""
@@ -126,24 +221,189 @@ class timeManagerBackend():
             # 计算过去7天的日期
             for i in range(7):
                 date = today - dt.timedelta(days=i)
-                date_str = date.strftime("%Y-%m-%d")
                 date_int = int(date.strftime("%Y%m%d"))
-                
-                # 检查数据文件是否存在
-                filename = f"{self.data_path}/{date_str}.json"
-                if os.path.exists(filename):
-                    try:
-                        with open(filename, 'r', encoding='utf-8') as f:
-                            data = json.loads(f.read())
-                        result[date_int] = data
-                    except Exception as e:
-                        self.logger.error(f"读取文件 {filename} 时出错: {e}")
-                        result[date_int] = {}
+                if date == self.current_date:
+                    # 计时中的这一天直接使用内存中的数据
+                    result[date_int] = self.report_cache.get(("day", date), ("memory", self.data_version),
+                                                             lambda: self._report_day(self._serialize_main_data()))
                 else:
-                    result[date_int] = {}
+                    filename = datafile.day_filename(self.data_path, date)
+                    result[date_int] = self.report_cache.get(("day", date), report_cache.file_signature(filename),
+                                                             lambda: self._report_day(datafile.read_day(filename, self.logger.error)))
             
             return result
 
+        @self.app.get("/cache/stats")
+        def get_cache_stats():
+            """报表缓存的命中率等指标"""
+            return self.report_cache.stats()
+
+        @self.app.get("/categories")
+        def get_categories():
+            """获取今天各分类的总时长"""
+            return dict(self.category_totals)
+
+        @self.app.get("/categories/history")
+        def get_categories_history(start: str = None, end: str = None):
+            """获取历史分类汇总，start/end 为 YYYY-MM-DD（含）"""
+            rollup = self.report_cache.get(("rollup",), report_cache.file_signature(category.rollup_path(self.data_path)),
+                                           lambda: category.read_rollup(self.data_path))
+            return {date: totals for date, totals in rollup.items()
+                    if (start is None or date >= start) and (end is None or date <= end)}
+
+        @self.app.post("/categories/reclassify")
+        def reclassify_categories():
+            """规则变更后在后台重新分类全部历史数据，进度见 /categories/reclassify/status"""
+            return self._start_rollup_task(self._run_reclassify)
+
+        @self.app.get("/categories/reclassify/status")
+        def reclassify_status():
+            """重分类的进度与最近一次结果"""
+            return self.reclassify_status
+
+        @self.app.post("/integrity/check")
+        def integrity_check(quarantine: bool = False):
+            """在后台并行检查全部历史数据并重建派生数据，进度见 /integrity/status"""
+            return self._start_rollup_task(self._run_integrity_check, quarantine)
+
+        @self.app.get("/integrity/status")
+        def integrity_status():
+            """完整性检查的进度与最近一次报告"""
+            return self.integrity_status
+
+        @self.app.get("/budgets")
+        def get_budgets():
+            """获取各预算规则的已用与剩余时间"""
+            return self.budget_engine.status()
+
+        @self.app.get("/events")
+        async def get_events(last_id: int = None, last_event_id: str = Header(None)):
+            """
+            以 Server-Sent Events 推送预算事件，最后收到的事件之后的历史事件会先补发
+
+            浏览器 EventSource 断线重连时自动携带 Last-Event-ID 头，优先使用；查询参数 last_id 用于首次连接
+            """
+            if last_event_id is not None:
+                try:
+                    last_id = int(last_event_id)
+                except ValueError:
+                    pass
+
+            async def event_stream():
+                seq = self.event_seq if last_id is None else last_id
+                while not self.stop:
+                    for event in list(self.events):
+                        if event['id'] > seq:
+                            seq = event['id']
+                            yield f"id: {seq}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(0.5)
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        @self.app.get("/timeline")
+        def get_timeline(start: float = None, end: float = None):
+            """以 NDJSON 流式返回 [start, end) 内的前台会话（包括尚未结束的当前会话），默认为今天"""
+            if start is None:
+                start = dt.datetime.combine(dt.datetime.today().date(), dt.time()).timestamp()
+            if end is None:
+                end = time.time()
+            session, limit = self._open_session(start, end)
+
+            def stream():
+                for store in self._timeline_stores(start, limit):
+                    for interval in store.between(start, limit):
+                        yield json.dumps(interval, ensure_ascii=False) + "\n"
+                if session:
+                    yield json.dumps(session, ensure_ascii=False) + "\n"
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        @self.app.get("/timeline/at")
+        def get_timeline_at(t: float):
+            """查询 t 时刻正在使用的应用"""
+            session = self.session
+            if session and session[0] <= t <= session[1]:
+                return {"start": session[0], "end": session[1], "exe": session[2], "title": session[3]}
+            for store in self._timeline_stores(t, t):
+                interval = store.at(t)
+                if interval:
+                    return interval
+            return {}
+
+        @self.app.get("/timeline/stats")
+        def get_timeline_stats(start: float, end: float, n: int = 10):
+            """[start, end) 内的切换次数与最长会话（包括尚未结束的当前会话）"""
+            session, limit = self._open_session(start, end)
+            count = 1 if session else 0
+            longest = [session] if session else []
+            for store in self._timeline_stores(start, limit):
+                count += store.count(start, limit)
+                longest.extend(store.longest(start, limit, n))
+            longest.sort(key=lambda i: min(i['end'], end) - max(i['start'], start), reverse=True)
+            return {"switches": max(0, count - 1), "longest": longest[:n]}
+
+        @self.app.get("/heatmap")
+        def get_heatmap(start: str = None, end: str = None, app: str = None, category: str = None,
+                        resolution: str = "hour"):
+            """
+            按星期与时段汇总使用时间，start/end 为 YYYY-MM-DD（含），默认最近 4 周
+
+            app 只统计指定 exe 路径，category 只统计指定分类；resolution 为 hour 或 slot（15 分钟）
+            """
+            today = dt.datetime.today().date()
+            try:
+                last = dt.datetime.strptime(end, "%Y-%m-%d").date() if end else today
+                first = dt.datetime.strptime(start, "%Y-%m-%d").date() if start else last - dt.timedelta(days=27)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="日期格式应为 YYYY-MM-DD")
+            if first > last or resolution not in ("hour", "slot"):
+                raise HTTPException(status_code=400, detail="参数错误")
+
+            select = None
+            if app or category:
+                def select(exe_path, value):
+                    if app and exe_path != app:
+                        return False
+                    if value is None:
+                        # 今天的时段数据在内存中，记录取自 main_data
+                        value = self.main_data.get(exe_path, {})
+                    return not category or self.category_matcher.classify_entry(exe_path, value) == category
+
+            def row_loader(date):
+                filename = datafile.day_filename(self.data_path, date)
+                return self.report_cache.get(("heatmap", date, app, category), report_cache.file_signature(filename),
+                                             lambda: heatmap.day_row(self.data_path, date, select))
+
+            return heatmap.aggregate(self.data_path, first, last, select,
+                                     {self.current_date: dict(self.slot_data)}, resolution, row_loader)
+
+        @self.app.get("/debug/profile")
+        def debug_profile(seconds: float = 5, x_debug_token: str = Header(None)):
+            """
+            对计时、自动保存和接口线程采样 seconds 秒（最多 120 秒）
+
+            需要在请求头 X-Debug-Token 中提供调试令牌；结果写入 ./log，返回耗时最高的函数
+            """
+            if not self._check_debug_token(x_debug_token):
+                raise HTTPException(status_code=403, detail="调试令牌无效")
+            if not self.profile_lock.acquire(blocking=False):
+                raise HTTPException(status_code=409, detail="已有采样正在进行")
+            try:
+                # 不采样正在等待结果的当前线程
+                current = threading.get_ident()
+                sampler = profiler.SamplingProfiler(
+                    thread_filter=lambda thread: thread.ident != current and profiler.default_thread_filter(thread))
+                sampler.run(max(1.0, min(seconds, 120.0)))
+                collapsed_path, report_path = sampler.save()
+            finally:
+                self.profile_lock.release()
+            self.logger.info(f"采样分析完成: {collapsed_path}")
+            return {
+                "samples": sampler.samples,
+                "duration": sampler.duration,
+                "collapsed": collapsed_path,
+                "report": report_path,
+                "top": sampler.top(30),
+            }
+
         @self.app.get("/icon/{icon_hash}")
         def get_icon(icon_hash: str):
             """获取应用图标"""
@@ -158,7 +418,18 @@ class timeManagerBackend():
                 else:
                     raise HTTPException(status_code=404, detail="Icon not found")
 
+    def _check_debug_token(self, token):
+        """
+        校验调试令牌
+
+        按 UTF-8 字节比较：compare_digest 遇到含非 ASCII 字符的 str 会抛出 TypeError
+        """
+        if not token or not self.debug_token:
+            return False
+        return secrets.compare_digest(token.encode('utf-8'), self.debug_token.encode('utf-8'))
+
     def run_backend(self):
+        import uvicorn
         uvicorn.run(self.app, host="127.0.0.1", port=25673)
 
     def start(self):
@@ -168,9 +439,9 @@ class timeManagerBackend():
 
         self.logger.info("已启动 计时")
 
-        self.backend_thread.start()
-
-        self.logger.info("已启动 后端")
+        if self.enable_api:
+            self.backend_thread.start()
+            self.logger.info("已启动 后端")
 
 
 
@@ -187,11 +458,12 @@ class timeManagerBackend():
         """
         current_data = None
         last_check_time = time.time()
-        current_date = dt.datetime.today().date()
 
         while True:
             # 检查是否需要停止主循环
             if self.stop:
+                self._close_session()
+                self.timeline.flush()
                 break
 
             # 每0.1秒检查一次前台窗口
@@ -200,10 +472,18 @@ class timeManagerBackend():
             today = dt.datetime.today().date()
             
             # 检测日期变化
-            if today != current_date:
-                self._save_current_data(current_date)
-                self._switch_to_new_date(today)
-                current_date = today
+            if today != self.current_date:
+                # 先读取新日期的数据：文件暂时无法读取时继续记在当前日期下，下一轮再试
+                try:
+                    new_data = self._load_day_data(today)
+                except OSError:
+                    new_data = None
+                if new_data is not None:
+                    # 与自动保存互斥：避免把昨天的数据写进今天的文件，或刷新已关闭的时间线
+                    with self.save_lock:
+                        self._close_session()
+                        self._save_current_data(self.current_date)
+                        self._switch_to_new_date(today, new_data)
             
             # 检测时间跳跃（睡眠/休眠导致）
             time_diff = current_time - last_check_time
@@ -211,84 +491,336 @@ class timeManagerBackend():
                 # 时间跳跃，不累加时间，只更新lastTime
                 if current_data:
                     current_data['lastTime'] = current_time
+                self._close_session()
                 last_check_time = current_time
                 continue
                 
             last_check_time = current_time
             
             info_data = tmlib.get_foreground_window_executable_info()
+            self._track_session(info_data, current_time)
             if info_data:
                 current_exe_path = info_data.exe_path
 
                 # 尝试获取当前可执行文件路径对应的时间统计数据
                 if current_exe_path not in self.main_data:
-                    # 如果当前路径未在main_data中记录，则初始化记录
-                    self.main_data[current_exe_path] = {'totalTime': 0, 'lastTime': 0.0}
-                    
-                    # 发现新应用，获取图标并添加图标路径到数据中
-                    try:
-                        import hashlib
-                        exe_hash = hashlib.md5(current_exe_path.encode('utf-8')).hexdigest()
-                        icon_path = tmlib.get_app_icon_path(current_exe_path, "./data/icon")
-                        icon_api_path = f"/icon/{exe_hash}"
-                        
-                        # 添加图标路径到应用数据中
-                        self.main_data[current_exe_path]['iconPath'] = icon_api_path
-                        self.logger.info(f"发现新应用: {current_exe_path}, 图标路径: {icon_api_path}")
-                    except Exception as e:
-                        self.logger.error(f"获取应用图标失败: {e}")
-                
+                    self._add_app(current_exe_path, info_data.title)
+
                 current_data = self.main_data[current_exe_path]
 
                 # 累加当前程序的使用时间计数
                 if 0<current_data['lastTime'] - int(current_data['lastTime']) < 0.1:
                     current_data['totalTime'] += 1
+                    current_category = current_data['category']
+                    self.category_totals[current_category] = self.category_totals.get(current_category, 0) + 1
+                    self.budget_engine.tick(current_exe_path, current_category)
+                    self.ranking.update(current_exe_path, current_data['totalTime'])
+                    if current_time >= self.slot_end:
+                        # 只在跨越时段边界时重新计算时段序号
+                        self.slot_index = heatmap.slot_of(current_time)
+                        self.slot_end = current_time - current_time % heatmap.SLOT_SECONDS + heatmap.SLOT_SECONDS
+                    self.slot_data[current_exe_path][self.slot_index] += 1
+                    self.data_version += 1
                 current_data['lastTime'] = current_time
 
+    def _add_app(self, exe_path, title):
+        """
+        初始化新应用的记录
+
+        首次出现时的窗口标题保存在 title 字段中，分类在任何时候都由 (exe路径, title) 决定，
+        重启或重分类后 title 规则的结果不变
+        """
+        # 如果当前路径未在main_data中记录，则初始化记录
+        entry = {
+            'totalTime': 0,
+            'lastTime': 0.0,
+            'title': title,
+        }
+        entry['category'] = self.category_matcher.classify_entry(exe_path, entry)
+        self.main_data[exe_path] = entry
+
+        # 发现新应用，获取图标并添加图标路径到数据中。
+        # 图标只通过 API 提供，不开启 API 的守护进程跳过提取，不加载 pywin32 / PIL
+        if self.enable_api:
+            self._add_app_icon(exe_path, entry)
+        else:
+            self.logger.info(f"发现新应用: {exe_path}")
+
+        self.ranking.update(exe_path, 0)
+        self.slot_data[exe_path] = heatmap.new_slots()
+        self.data_version += 1
+
+    def _add_app_icon(self, exe_path, entry):
+        """提取应用图标，并把图标的 API 路径写入记录"""
+        try:
+            import hashlib
+            exe_hash = hashlib.md5(exe_path.encode('utf-8')).hexdigest()
+            icon_path = tmlib.get_app_icon_path(exe_path, "./data/icon")
+            icon_api_path = f"/icon/{exe_hash}"
+
+            # 添加图标路径到应用数据中
+            entry['iconPath'] = icon_api_path
+            self.logger.info(f"发现新应用: {exe_path}, 图标路径: {icon_api_path}")
+        except Exception as e:
+            self.logger.error(f"获取应用图标失败: {e}")
+
+    def _track_session(self, info_data, current_time):
+        """根据本次采样更新当前会话，前台窗口或标题变化时结束上一段会话"""
+        if not info_data:
+            self._close_session()
+            return
+        if self.session and self.session[2] == info_data.exe_path and self.session[3] == info_data.title:
+            self.session[1] = current_time
+            return
+        # 切换窗口：上一段会话在本次采样时刻结束，保证时间线连续
+        self._close_session(current_time)
+        self.session = [current_time, current_time, info_data.exe_path, info_data.title]
+
+    def _close_session(self, end=None):
+        """结束当前会话并写入时间线"""
+        if self.session:
+            start, last_seen, exe_path, title = self.session
+            self.timeline.append(start, end if end is not None else last_seen, exe_path, title)
+            self.session = None
+
+    def _timeline_stores(self, start, end):
+        """
+        按日期顺序返回可能与 [start, end) 相交的时间线（今天使用正在写入的那一份）
+
+        会话记在开始的那一天，跨过零点的会话在前一天的文件中，因此从 start 的前一天开始。
+        已结束日期的时间线只读，按文件签名缓存在 report_cache 中，不必每次请求都重新解析
+        """
+        dates = timeline.dates_between(start, end)
+        for date in [dates[0] - dt.timedelta(days=1)] + dates:
+            if date == self.timeline.date:
+                yield self.timeline
+                continue
+            records_path, names_path = timeline.store_paths(self.data_path, date)
+            version = (report_cache.file_signature(records_path), report_cache.file_signature(names_path))
+            if version[0] is None:
+                continue
+            store = self.report_cache.get(("timeline", date), version,
+                                          lambda: timeline.TimelineStore(self.data_path, date))
+            if len(store):
+                yield store
+
+    def _open_session(self, start, end):
+        """
+        当前会话的快照（与 [start, end) 不相交时为 None），以及查询已结束会话时应使用的区间终点
+
+        当前会话可能在查询过程中结束并写入时间线；只查询它开始之前的已结束会话，避免重复
+        """
+        session = self.session
+        if not session:
+            return None, end
+        session_start, last_seen, exe_path, title = session
+        limit = max(start, min(end, session_start))
+        if not (last_seen > start and session_start < end):
+            return None, limit
+        return {"start": session_start, "end": last_seen, "exe": exe_path, "title": title}, limit
+
+    def _rebuild_day_indexes(self):
+        """加载一天的数据后，为每个应用确定分类，并重建分类总时长与应用排行"""
+        totals = {}
+        for exe_path, value in self.main_data.items():
+            value['category'] = self.category_matcher.classify_entry(exe_path, value)
+            totals[value['category']] = totals.get(value['category'], 0) + value['totalTime']
+        self.category_totals = totals
+        self.ranking.rebuild(self.main_data)
+        self.data_version += 1
+        self.slot_data = {}
+        for exe_path, value in self.main_data.items():
+            slots = value.pop('slots', None)
+            self.slot_data[exe_path] = heatmap.decode_slots(slots) if slots else heatmap.new_slots()
+
+    def _start_rollup_task(self, target, *args, **kwargs):
+        """在后台线程中重建分类汇总；已有重分类或完整性检查在运行时不再启动"""
+        if self.rollup_thread and self.rollup_thread.is_alive():
+            return {"status": "running"}
+
+        def run():
+            try:
+                target(*args, **kwargs)
+            except Exception:
+                self.logger.exception("后台重建分类汇总失败")
+
+        self.rollup_thread = threading.Thread(target=run, daemon=True)
+        self.rollup_thread.start()
+        return {"status": "started"}
+
+    def _run_reclassify(self):
+        def progress(done, total):
+            self.reclassify_status.update(done=done, total=total)
+
+        self.reclassify_status = {"running": True, "done": 0, "total": 0, "report": None}
+        try:
+            # 先保存今天的数据，保证今天也按新规则重算
+            self.save()
+            rollup = category.reclassify_history(self.data_path, self.category_rules, logger=self.logger,
+                                                 progress=progress)
+            report = {"days": len(rollup)}
+        except Exception as e:
+            self.logger.error(f"重分类失败: {e}")
+            report = {"error": str(e)}
+        self.reclassify_status.update(running=False, report=report)
+
+    def _run_integrity_check(self, quarantine):
+        def progress(done, total):
+            self.integrity_status.update(done=done, total=total)
+
+        self.integrity_status = {"running": True, "done": 0, "total": 0, "report": None}
+        try:
+            # 先保存今天的数据，保证检查的是最新内容
+            self.save()
+            report = integrity.check_history(self.data_path, self.category_rules, quarantine=quarantine,
+                                             progress=progress, logger=self.logger)
+        except Exception as e:
+            self.logger.error(f"完整性检查失败: {e}")
+            report = {"error": str(e)}
+        self.integrity_status.update(running=False, report=report)
+
+    def _load_budget_usage(self, date):
+        """读取本周之前几天的数据，初始化预算已用时间（每天只执行一次）"""
+        week_days = []
+        for i in range(date.weekday(), 0, -1):
+            day = datafile.read_day(datafile.day_filename(self.data_path, date - dt.timedelta(days=i)), self.logger.error)
+            if day:
+                week_days.append(day)
+        self.budget_engine.load_usage(self.main_data, week_days, self.category_matcher.classify_entry)
+
+    def add_event_listener(self, listener):
+        """注册预算事件监听者，监听者在计时线程中被调用"""
+        self.event_listeners.append(listener)
+
+    def _emit_event(self, event):
+        self.event_seq += 1
+        event['id'] = self.event_seq
+        self.events.append(event)
+        self.logger.info(f"预算事件: {event}")
+        for listener in self.event_listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"预算事件处理失败: {e}")
+
+    def _serialize_main_data(self):
+        """
+        生成写入日数据文件的内容：main_data 加上编码后的时段计数
+
+        分类不写入文件，读取时按当前规则用 classify_entry 重新计算，规则变更后不会留下过期的分类
+        """
+        result = {}
+        for exe_path, value in list(self.main_data.items()):
+            entry = {key: item for key, item in value.items() if key != 'category'}
+            slots = self.slot_data.get(exe_path)
+            if slots:
+                entry['slots'] = heatmap.encode_slots(slots)
+            result[exe_path] = entry
+        return result
+
+    def _report_day(self, day):
+        """报表用的一天数据：按当前规则为每条记录填入分类（旧文件中可能留有过期的 category 字段）"""
+        return {exe_path: dict(value, category=self.category_matcher.classify_entry(exe_path, value))
+                for exe_path, value in day.items() if isinstance(value, dict)}
+
+    def _write_day_file(self, date):
+        """把 main_data 写入指定日期的数据文件"""
+        with open(datafile.day_filename(self.data_path, date), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._serialize_main_data(), indent=4, ensure_ascii=False))
+
     def _save_current_data(self, date):
         """保存指定日期的数据"""
         if self.main_data:
-            filename = f"{self.data_path}/{date.strftime('%Y-%m-%d')}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(json.dumps(self.main_data, indent=4, ensure_ascii=False))
+            self._write_day_file(date)
             self.logger.info(f'跨天切换：已保存 {date.strftime("%Y-%m-%d")} 的数据')
+            # 结束的一天写入分类汇总，/categories/history 无需等待重分类即可看到
+            try:
+                category.update_rollup(self.data_path, date.strftime('%Y-%m-%d'), dict(self.category_totals))
+            except OSError as e:
+                self.logger.error(f"写入分类汇总失败: {e}")
 
-    def _switch_to_new_date(self, new_date):
-        """切换到新日期的数据文件"""
-        filename = f"{self.data_path}/{new_date.strftime('%Y-%m-%d')}.json"
-        
-        # 加载新日期的数据（如果存在）
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                file_str = f.read()
+    def _load_day_data(self, date):
+        """
+        读取指定日期的数据文件，并把旧格式转换为新格式
+
+        内容无法解析或未通过 integrity.validate_day 校验时记录错误，把文件移入隔离目录并从空数据开始。
+        文件存在却无法读取（如被杀毒软件占用）时稍后重试，仍然失败就抛出 OSError，
+        不能带着空数据继续运行，否则下一次保存会覆盖原文件
+
+        Raises:
+            OSError: 重试后文件仍无法读取
+        """
+        filename = datafile.day_filename(self.data_path, date)
+        if not os.path.exists(filename):
+            return {}
+        for attempt in range(LOAD_RETRIES):
             try:
-                loaded_data = json.loads(file_str)
-                # 使用与 __init__ 中相同的数据格式转换逻辑
-                self.main_data = {}
-                for key, value in loaded_data.items():
-                    if 'totalTime' in value and 'lastTime' in value:
-                        self.main_data[key] = value
-                    elif 'total_time' in value and 'last_time' in value:
-                        self.main_data[key] = {
-                            'totalTime': value['total_time'],
-                            'lastTime': value['last_time']
-                        }
-                    else:
-                        self.main_data[key] = {'totalTime': 0, 'lastTime': 0.0}
-            except:
-                self.main_data = {}
-        else:
-            self.main_data = {}
-        
+                loaded_data = datafile.load_day_file(filename)
+                errors = integrity.validate_day(loaded_data)
+                break
+            except ValueError as e:
+                errors = [str(e)]
+                break
+            except OSError as e:
+                if attempt == LOAD_RETRIES - 1:
+                    self.logger.error(f"无法读取文件 {filename}: {e}")
+                    raise
+                time.sleep(0.5)
+
+        if errors:
+            self.logger.error(f"数据文件 {filename} 已损坏: {errors[:3]}")
+            try:
+                self.logger.error(f"已隔离损坏的数据文件: {integrity.quarantine_file(self.data_path, filename)}")
+            except OSError as move_error:
+                self.logger.error(f"隔离文件 {filename} 失败: {move_error}")
+            return {}
+
+        main_data = {}
+        for key, value in loaded_data.items():
+            if 'totalTime' in value and 'lastTime' in value:
+                # 已经是新格式，直接使用
+                main_data[key] = value
+            else:
+                # 旧格式，转换为新格式
+                main_data[key] = {
+                    'totalTime': value.get('totalTime', value.get('total_time')),
+                    'lastTime': value.get('lastTime', value.get('last_time')),
+                }
+        return main_data
+
+    def _switch_to_new_date(self, new_date, main_data):
+        """切换到新日期，main_data 为已读取的新日期数据（调用方持有 save_lock）"""
+        self.current_date = new_date
+        self.main_data = main_data
+
+        self._rebuild_day_indexes()
+        self._load_budget_usage(new_date)
+        # 先打开新的时间线再关闭旧的，查询线程不会拿到已关闭的文件
+        previous, self.timeline = self.timeline, timeline.TimelineStore(self.data_path, new_date, writable=True)
+        previous.close()
         self.logger.info(f'跨天切换：已切换到 {new_date.strftime("%Y-%m-%d")} 的数据')
 
+    def save(self):
+        """
+        保存当前日期的数据与时间线（可能同时被自动保存和完整性检查调用）
+
+        写入 current_date 而不是系统日期：刚过零点、计时线程还未切换时，main_data 仍是前一天的数据
+        """
+        with self.save_lock:
+            self._write_day_file(self.current_date)
+            self.timeline.flush()
+
     def auto_save_(self):
         while 1:
             time.sleep(self.auto_save_query)
             if self.stop:
                 break
-            with open(self.data_path+'/'+ str(dt.datetime.today().strftime("%Y-%m-%d")) + ".json",'w+',encoding='utf-8') as f:
-                f.write(json.dumps(self.main_data,indent=4,ensure_ascii=False))
+            try:
+                self.save()
+            except (OSError, ValueError) as e:
+                # 保存失败不能终止自动保存线程，下一轮再试
+                self.logger.error(f"自动保存失败: {e}")
+                continue
             self.logger.info('saved data automatically.')
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+预算引擎性能测试
+
+比较 1 条规则与数百条规则时每次计时（tick）的耗时，
+验证主循环的开销不随规则数量增长。
+
+运行: python benchmarks/bench_budgets.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import budgets
+
+
+TICKS = 1_000_000
+APPS = [f"C:\\Apps\\app{i}.exe" for i in range(1000)]
+CATEGORIES = [f"category{i}" for i in range(50)]
+
+
+def make_rules(count):
+    rng = random.Random(count)
+    rules = []
+    for i in range(count):
+        if i % 2:
+            rules.append(budgets.BudgetRule("app", rng.choice(APPS), "daily", 10 ** 9, [0.5, 0.8]))
+        else:
+            rules.append(budgets.BudgetRule("category", rng.choice(CATEGORIES), "weekly", 10 ** 9, [0.8]))
+    return rules
+
+
+def bench(rule_count):
+    engine = budgets.BudgetEngine(make_rules(rule_count))
+    rng = random.Random(0)
+    samples = [(rng.choice(APPS), rng.choice(CATEGORIES)) for _ in range(1000)]
+    start = time.perf_counter()
+    for i in range(TICKS):
+        exe_path, category_name = samples[i % 1000]
+        engine.tick(exe_path, category_name)
+    elapsed = time.perf_counter() - start
+    return elapsed / TICKS * 1e9
+
+
+if __name__ == "__main__":
+    for count in (1, 100, 500, 1000):
+        print(f"{count:>5} 条规则: {bench(count):8.1f} ns/tick")
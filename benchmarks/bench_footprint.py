@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+守护进程与完整界面进程的资源对比
+
+依次启动真实的入口（daemon.py、daemon.py --api、main.py），
+以日志中出现“已启动 计时”为启动完成，测量启动耗时；
+再等待 --settle 秒（界面进程此时已创建 webview 窗口并加载页面），
+对进程及其全部子进程（WebView2 / 浏览器渲染进程）的 RSS 求和。
+
+需要在 Windows 上运行（计时依赖 user32），并需要 psutil。
+main.py 使用仓库根目录下的 config.json 与数据目录，运行前请先退出正在运行的 time manager；
+守护进程使用临时数据目录。结果同时写入 ./log/footprint-<时间>.json，便于记录与对比。
+
+运行: python benchmarks/bench_footprint.py [--settle 20]
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READY_MARK = "已启动 计时"
+
+
+def _read_lines(stream, lines):
+    for line in stream:
+        lines.put(line)
+
+
+def process_tree_rss(pid):
+    """进程及其全部子进程的 RSS 合计与进程数"""
+    root = psutil.Process(pid)
+    rss = 0
+    processes = [root] + root.children(recursive=True)
+    for process in processes:
+        try:
+            rss += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss, len(processes)
+
+
+def kill_tree(pid):
+    try:
+        root = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    for process in root.children(recursive=True) + [root]:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def measure(args, settle, timeout=60):
+    """启动一个入口，返回 {"startup": 秒, "rss": 字节, "processes": 进程数}"""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + args, cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace")
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+    try:
+        startup = None
+        output = []
+        while startup is None:
+            try:
+                line = lines.get(timeout=max(0.0, timeout - (time.perf_counter() - start)))
+            except queue.Empty:
+                raise RuntimeError("启动超时:\n" + "".join(output[-20:]))
+            output.append(line)
+            if READY_MARK in line:
+                startup = time.perf_counter() - start
+        time.sleep(settle)
+        if process.poll() is not None:
+            raise RuntimeError("进程已退出:\n" + "".join(output[-20:]))
+        rss, count = process_tree_rss(process.pid)
+        return {"startup": startup, "rss": rss, "processes": count}
+    finally:
+        kill_tree(process.pid)
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="守护进程与完整界面进程的资源对比")
+    parser.add_argument('--settle', type=float, default=20, help="启动完成后等待多少秒再测量内存")
+    options = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_path:
+        config = os.path.join(data_path, "config.json")
+        with open(config, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        daemon = ["daemon.py", "--config", config, "--data-path", data_path]
+        cases = [
+            ("守护进程", daemon),
+            ("守护进程 + API", daemon + ["--api"]),
+            ("完整界面进程", ["main.py"]),
+        ]
+        for label, args in cases:
+            try:
+                result = measure(args, options.settle)
+            except RuntimeError as e:
+                print(f"{label}: 测量失败\n{e}")
+                continue
+            results[label] = result
+            print(f"{label}: 启动 {result['startup'] * 1000:.0f} ms, "
+                  f"{result['processes']} 个进程, RSS 合计 {result['rss'] / 1024 / 1024:.1f} MiB")
+
+    os.makedirs(os.path.join(ROOT, "log"), exist_ok=True)
+    filename = os.path.join(ROOT, "log", f"footprint-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"platform": platform.platform(), "python": platform.python_version(),
+                            "settle": options.settle, "results": results}, indent=4, ensure_ascii=False))
+    print(f"结果已写入 {filename}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+热力图汇总性能测试
+
+生成一年、每天 1000 个应用（均带时段计数）的日数据文件，
+测量汇总整年热力图的耗时，并与逐个字典、逐个时段累加的 Python 循环对比。
+
+运行: python benchmarks/bench_heatmap.py
+"""
+
+import datetime as dt
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datafile
+import heatmap
+
+
+DAYS = 365
+APPS = 1000
+
+
+def python_loop(data_path, first, last):
+    """对比实现：解码后用纯 Python 逐时段累加"""
+    weekday = [[0] * heatmap.SLOTS for _ in range(7)]
+    for i in range((last - first).days + 1):
+        date = first + dt.timedelta(days=i)
+        for value in datafile.read_day(datafile.day_filename(data_path, date)).values():
+            row = weekday[date.weekday()]
+            for slot, seconds in enumerate(heatmap.decode_slots(value['slots'])):
+                row[slot] += seconds
+    return weekday
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    first = dt.date(2024, 1, 1)
+    last = first + dt.timedelta(days=DAYS - 1)
+    with tempfile.TemporaryDirectory() as data_path:
+        for i in range(DAYS):
+            day = {}
+            for app in range(APPS):
+                slots = heatmap.new_slots()
+                for _ in range(4):
+                    slots[rng.randrange(heatmap.SLOTS)] += rng.randrange(900)
+                day[f"C:\\Apps\\app{app}.exe"] = {"totalTime": sum(slots), "lastTime": 0.0,
+                                                  "slots": heatmap.encode_slots(slots)}
+            date = first + dt.timedelta(days=i)
+            with open(os.path.join(data_path, date.strftime("%Y-%m-%d") + ".json"), 'w', encoding='utf-8') as f:
+                f.write(json.dumps(day, indent=4))
+
+        start = time.perf_counter()
+        result = heatmap.aggregate(data_path, first, last)
+        print(f"NumPy 汇总 {DAYS} 天 x {APPS} 应用: {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        python_loop(data_path, first, last)
+        print(f"对比：Python 循环: {time.perf_counter() - start:.2f}s")
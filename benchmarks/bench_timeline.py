@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+时间线性能测试
+
+模拟一年、每秒切换一次窗口的数据量（按天分文件存储），
+测量写入、加载以及点查询/范围查询的耗时。
+
+运行: python benchmarks/bench_timeline.py
+"""
+
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeline
+
+
+SECONDS_PER_DAY = 86400
+DAYS = 365
+
+
+def fill_day(data_path, date, rng):
+    base = dt.datetime.combine(date, dt.time()).timestamp()
+    store = timeline.TimelineStore(data_path, date, writable=True)
+    for second in range(SECONDS_PER_DAY):
+        app = rng.randrange(200)
+        store.append(base + second, base + second + 1, f"C:\\Apps\\app{app}.exe", f"title {app % 20}")
+    store.close()
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    first = dt.date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as data_path:
+        start = time.perf_counter()
+        fill_day(data_path, first, rng)
+        write_day = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(timeline.timeline_dir(data_path), "2024-01-01.bin"))
+        print(f"写入一天 ({SECONDS_PER_DAY} 段会话): {write_day:.2f}s, {size / 1024 / 1024:.1f} MiB")
+        print(f"一年预计占用: {size * DAYS / 1024 / 1024 / 1024:.2f} GiB")
+
+        start = time.perf_counter()
+        store = timeline.TimelineStore(data_path, first)
+        print(f"加载一天: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        base = dt.datetime.combine(first, dt.time()).timestamp()
+        queries = [base + rng.random() * SECONDS_PER_DAY for _ in range(100_000)]
+        start = time.perf_counter()
+        for t in queries:
+            store.at(t)
+        print(f"点查询: {(time.perf_counter() - start) / len(queries) * 1e6:.2f} us/次")
+
+        start = time.perf_counter()
+        for t in queries:
+            store.switch_count(t, t + 3600)
+        print(f"一小时切换次数: {(time.perf_counter() - start) / len(queries) * 1e6:.2f} us/次")
+
+        start = time.perf_counter()
+        count = sum(1 for _ in store.between(base + 14 * 3600, base + 15 * 3600))
+        print(f"范围查询 14:00-15:00 ({count} 段): {(time.perf_counter() - start) * 1000:.1f} ms")
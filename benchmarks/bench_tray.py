@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+托盘模式资源占用测量
+
+对正在运行的 main.py 进程及其全部子进程（WebView2 / 浏览器渲染进程）
+采样内存（RSS 合计）和 CPU 占用。需要 psutil。
+
+对比方法（tray_unload_after 设为 60）:
+    1. 启动 main.py，窗口可见时运行一次
+    2. 关闭窗口到托盘，60 秒内运行一次（只停止轮询）
+    3. 60 秒后再运行一次（页面已卸载）
+    4. 把 tray_unload_after 设为 null 重启，关闭到托盘后运行一次（原有行为：页面常驻并持续轮询）
+
+每次的结果按 --label 追加到 ./log/tray.json，四步完成后即可对比。
+
+运行: python benchmarks/bench_tray.py <pid> --label visible [--seconds 30]
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import time
+
+import psutil
+
+
+def process_tree(pid):
+    root = psutil.Process(pid)
+    return [root] + root.children(recursive=True)
+
+
+def sample(pid, seconds):
+    processes = process_tree(pid)
+    for process in processes:
+        process.cpu_percent(None)
+    time.sleep(seconds)
+    cpu = 0.0
+    rss = 0
+    for process in processes:
+        try:
+            cpu += process.cpu_percent(None)
+            rss += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return len(processes), rss, cpu
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="测量进程树的内存与 CPU 占用")
+    parser.add_argument('pid', type=int)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--label', default="", help="本次测量的场景，如 visible / tray / unloaded / baseline")
+    args = parser.parse_args()
+
+    count, rss, cpu = sample(args.pid, args.seconds)
+    print(f"{count} 个进程, RSS 合计 {rss / 1024 / 1024:.1f} MiB, 平均 CPU {cpu:.1f}%")
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    filename = os.path.join(root, "log", "tray.json")
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    records = []
+    if os.path.exists(filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            records = json.loads(f.read())
+    records.append({"time": dt.datetime.now().isoformat(timespec='seconds'), "label": args.label,
+                    "platform": platform.platform(), "seconds": args.seconds,
+                    "processes": count, "rss": rss, "cpu": cpu})
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(records, indent=4, ensure_ascii=False))
+    print(f"结果已追加到 {filename}")
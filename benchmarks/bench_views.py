@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+应用排行视图性能测试
+
+在 1 万个不同应用的情况下，测量每次计时维护排行的耗时，
+以及取一页排行（含过滤）的耗时，并与每次请求全量排序对比。
+
+运行: python benchmarks/bench_views.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import views
+
+
+APPS = 10_000
+TICKS = 200_000
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    data = {f"C:\\Apps\\app{i}.exe": {"totalTime": rng.randrange(3600)} for i in range(APPS)}
+    ranking = views.RankedIndex()
+    ranking.rebuild(data)
+
+    keys = list(data)
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        key = keys[rng.randrange(APPS)]
+        data[key]["totalTime"] += 1
+        ranking.update(key, data[key]["totalTime"])
+    print(f"维护排行: {(time.perf_counter() - start) / TICKS * 1e6:.2f} us/tick")
+
+    rounds = 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ranking.page(0, 50)
+    print(f"取前 50: {(time.perf_counter() - start) / rounds * 1e6:.1f} us/次")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ranking.page(0, 50, lambda key: "app1" in key)
+    print(f"过滤后取前 50: {(time.perf_counter() - start) / rounds * 1e6:.1f} us/次")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        sorted(data.items(), key=lambda item: item[1]["totalTime"], reverse=True)[:50]
+    print(f"对比：每次全量排序: {(time.perf_counter() - start) / 100 * 1e6:.1f} us/次")
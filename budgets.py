@@ -0,0 +1,165 @@
+import time
+from typing import Optional, Dict, Any, List, Callable
+from dataclasses import dataclass, field
+
+import datafile
+
+
+@dataclass
+class BudgetRule:
+    """
+    时间预算规则数据类
+
+    Attributes:
+        target: 预算对象类型，app（可执行文件路径）或 category（分类名）
+        name: 预算对象，即 exe 路径或分类名
+        period: 统计周期，daily 或 weekly（周一为一周开始）
+        limit: 预算上限（秒）
+        warn: 预警阈值，为上限的比例列表，例如 [0.8]
+    """
+    target: str
+    name: str
+    period: str
+    limit: int
+    warn: List[float] = field(default_factory=lambda: [0.8])
+
+
+def parse_rules(raw_rules: Optional[List[Dict[str, Any]]]) -> List[BudgetRule]:
+    """
+    将 config.json 中的 budgets 配置转换为规则列表
+
+    Args:
+        raw_rules: 形如 {"target": "category", "name": "games", "period": "daily", "limit": 3600} 的字典列表
+
+    Returns:
+        List[BudgetRule]: 规则列表
+    """
+    rules = []
+    for item in raw_rules or []:
+        target = item.get("target", "app")
+        period = item.get("period", "daily")
+        if target not in ("app", "category"):
+            raise ValueError(f"未知的预算对象类型: {target}")
+        if period not in ("daily", "weekly"):
+            raise ValueError(f"未知的预算周期: {period}")
+        rules.append(BudgetRule(target=target, name=item["name"], period=period,
+                                limit=int(item["limit"]), warn=list(item.get("warn", [0.8]))))
+    return rules
+
+
+class _RuleState(object):
+    """
+    单条规则的运行状态
+
+    阈值在创建时预先排好序，next_trigger 为下一次触发事件所需的已用秒数，
+    因此每次计时只需要一次加法和一次比较。
+    """
+    __slots__ = ("rule", "used", "thresholds", "next_index", "next_trigger")
+
+    def __init__(self, rule: BudgetRule):
+        self.rule = rule
+        points = {int(rule.limit * ratio): "warning" for ratio in rule.warn if 0 < ratio < 1}
+        points[rule.limit] = "exceeded"
+        self.thresholds = sorted(points.items())
+        self.set_used(0)
+
+    def set_used(self, used: int):
+        """设置已用时间，并跳过已经越过的阈值（不补发事件）"""
+        self.used = used
+        self.next_index = 0
+        while self.next_index < len(self.thresholds) and self.thresholds[self.next_index][0] <= used:
+            self.next_index += 1
+        self._update_next_trigger()
+
+    def _update_next_trigger(self):
+        if self.next_index < len(self.thresholds):
+            self.next_trigger = self.thresholds[self.next_index][0]
+        else:
+            self.next_trigger = float("inf")
+
+
+class BudgetEngine(object):
+    """
+    时间预算引擎
+
+    规则按 exe 路径和分类名建立索引，每次计时只访问与当前应用相关的规则，
+    与规则总数无关。触发的事件通过 on_event 回调发出。
+    """
+
+    def __init__(self, rules: List[BudgetRule], on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.states = [_RuleState(rule) for rule in rules]
+        self.on_event = on_event
+        self._by_app: Dict[str, List[_RuleState]] = {}
+        self._by_category: Dict[str, List[_RuleState]] = {}
+        for state in self.states:
+            index = self._by_app if state.rule.target == "app" else self._by_category
+            index.setdefault(state.rule.name, []).append(state)
+
+    def load_usage(self, today_data: Dict[str, Dict[str, Any]], week_days: List[Dict[str, Dict[str, Any]]],
+                   classify: Callable[[str, Dict[str, Any]], str]):
+        """
+        根据已有数据初始化各规则的已用时间，仅在启动和跨天时调用
+
+        Args:
+            today_data: 今天的 main_data
+            week_days: 本周今天之前每天的数据
+            classify: (exe 路径, 记录) 到分类名的映射函数，如 CategoryMatcher.classify_entry
+        """
+        daily = self._usage(today_data, classify)
+        weekly = dict(daily)
+        for day_data in week_days:
+            for key, seconds in self._usage(day_data, classify).items():
+                weekly[key] = weekly.get(key, 0) + seconds
+        for state in self.states:
+            usage = daily if state.rule.period == "daily" else weekly
+            state.set_used(usage.get((state.rule.target, state.rule.name), 0))
+
+    @staticmethod
+    def _usage(day_data: Dict[str, Dict[str, Any]], classify: Callable[[str, Dict[str, Any]], str]) -> Dict[tuple, int]:
+        usage: Dict[tuple, int] = {}
+        for exe_path, value in day_data.items():
+            if not isinstance(value, dict):
+                continue
+            seconds = datafile.entry_seconds(value)
+            for key in (("app", exe_path), ("category", classify(exe_path, value))):
+                usage[key] = usage.get(key, 0) + seconds
+        return usage
+
+    def tick(self, exe_path: str, category_name: str, seconds: int = 1):
+        """记录一次计时，在主循环中每累加一秒调用一次"""
+        for index, key in ((self._by_app, exe_path), (self._by_category, category_name)):
+            states = index.get(key)
+            if not states:
+                continue
+            for state in states:
+                state.used += seconds
+                if state.used >= state.next_trigger:
+                    self._fire(state)
+
+    def _fire(self, state: _RuleState):
+        while state.next_index < len(state.thresholds) and state.thresholds[state.next_index][0] <= state.used:
+            level = state.thresholds[state.next_index][1]
+            state.next_index += 1
+            if self.on_event:
+                self.on_event({
+                    "time": time.time(),
+                    "level": level,
+                    "target": state.rule.target,
+                    "name": state.rule.name,
+                    "period": state.rule.period,
+                    "used": state.used,
+                    "limit": state.rule.limit,
+                })
+        state._update_next_trigger()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """返回所有规则的已用与剩余时间"""
+        return [{
+            "target": state.rule.target,
+            "name": state.rule.name,
+            "period": state.rule.period,
+            "limit": state.rule.limit,
+            "used": state.used,
+            "remaining": max(0, state.rule.limit - state.used),
+            "nextTrigger": None if state.next_trigger == float("inf") else state.next_trigger,
+        } for state in self.states]
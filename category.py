@@ -0,0 +1,374 @@
+import os
+import re
+import json
+import fnmatch
+import threading
+import datetime as dt
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+import datafile
+
+
+# 未命中任何规则时使用的分类名
+DEFAULT_CATEGORY = "uncategorized"
+
+# 汇总文件（按日期记录各分类总时长），属于可由原始日数据重建的派生数据
+ROLLUP_FILENAME = "categories.json"
+
+# 汇总文件的读-改-写需要串行（跨天追加与全量重建可能同时发生）
+rollup_lock = threading.Lock()
+
+
+@dataclass
+class CategoryRule:
+    """
+    分类规则数据类
+
+    Attributes:
+        category: 命中后归入的分类名
+        kind: 匹配方式，prefix / glob / regex
+        pattern: 匹配模式
+        field: 匹配字段，exe（可执行文件路径）或 title（窗口标题）
+    """
+    category: str
+    kind: str
+    pattern: str
+    field: str = "exe"
+
+
+def parse_rules(raw_rules: Optional[List[Dict[str, Any]]]) -> List[CategoryRule]:
+    """
+    将 config.json 中的 categories 配置转换为规则列表
+
+    Args:
+        raw_rules: 形如 {"category": "work", "type": "prefix", "pattern": "C:\\\\Work", "field": "exe"} 的字典列表
+
+    Returns:
+        List[CategoryRule]: 规则列表，顺序即优先级（越靠前越优先）
+    """
+    rules = []
+    for item in raw_rules or []:
+        kind = item.get("type", "prefix")
+        field = item.get("field", "exe")
+        if kind not in ("prefix", "glob", "regex"):
+            raise ValueError(f"未知的分类规则类型: {kind}")
+        if field not in ("exe", "title"):
+            raise ValueError(f"未知的分类规则字段: {field}")
+        if kind == "prefix" and field != "exe":
+            raise ValueError("prefix 规则只能用于 exe 字段")
+        if kind == "regex":
+            try:
+                re.compile(item["pattern"], re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"分类规则的正则表达式无效: {item['pattern']!r}: {e}")
+        rules.append(CategoryRule(category=item["category"], kind=kind,
+                                  pattern=item["pattern"], field=field))
+    return rules
+
+
+def _split_path(path: str) -> List[str]:
+    """按路径分隔符拆分并转小写（Windows 路径不区分大小写）"""
+    return [part for part in re.split(r"[\\/]+", path.lower()) if part]
+
+
+class CategoryMatcher(object):
+    """
+    预编译的分类匹配器
+
+    所有 prefix 规则编译为一棵按路径分量索引的前缀树，
+    glob 与 regex 规则按字段分别合并为一个大正则。
+    一次分类只需要遍历一次路径分量、执行最多两次正则匹配，
+    与规则数量基本无关。多条规则同时命中时，取配置中最靠前的一条。
+
+    含捕获组（合并后反向引用的编号会改变）或全局内联标志（如 (?i)，只能写在整个表达式开头）
+    的正则无法合并，这些规则单独编译并逐条匹配。
+    """
+
+    def __init__(self, rules: List[CategoryRule]):
+        self.rules = list(rules)
+        self._trie: Dict[str, Any] = {}
+        self._cache: Dict[Tuple[str, str], str] = {}
+
+        exe_parts = []
+        title_parts = []
+        # 无法合并的正则规则: [(规则序号, 编译结果)]，按序号排列
+        self._exe_single: List[Tuple[int, Any]] = []
+        self._title_single: List[Tuple[int, Any]] = []
+        for index, rule in enumerate(self.rules):
+            if rule.kind == "prefix":
+                node = self._trie
+                for part in _split_path(rule.pattern):
+                    node = node.setdefault(part, {})
+                # 同一节点上只保留优先级最高的规则
+                node.setdefault(None, index)
+                continue
+
+            if rule.kind == "glob":
+                source = fnmatch.translate(rule.pattern.lower())
+            else:
+                compiled = re.compile(rule.pattern, re.IGNORECASE)
+                # 前置 .*? 使 match 具有 search 语义
+                source = r"(?s:.*?)(?:" + rule.pattern + ")"
+                try:
+                    mergeable = compiled.groups == 0 and re.compile(source) is not None
+                except re.error:
+                    mergeable = False
+                if not mergeable:
+                    (self._exe_single if rule.field == "exe" else self._title_single).append((index, compiled))
+                    continue
+            group = f"(?P<_r{index}>{source})"
+            (exe_parts if rule.field == "exe" else title_parts).append(group)
+
+        # 正则的多选分支按顺序尝试，因此第一个命中的分支就是优先级最高的规则
+        self._exe_regex = re.compile("|".join(exe_parts), re.IGNORECASE) if exe_parts else None
+        self._title_regex = re.compile("|".join(title_parts), re.IGNORECASE) if title_parts else None
+        self.uses_title = self._title_regex is not None or bool(self._title_single)
+
+    def _match_trie(self, exe_path: str) -> Optional[int]:
+        best = None
+        node = self._trie
+        for part in _split_path(exe_path):
+            node = node.get(part)
+            if node is None:
+                break
+            index = node.get(None)
+            if index is not None and (best is None or index < best):
+                best = index
+        return best
+
+    @staticmethod
+    def _match_regex(regex, text: str) -> Optional[int]:
+        if regex is None or not text:
+            return None
+        m = regex.match(text)
+        if not m:
+            return None
+        return int(m.lastgroup[2:])
+
+    @staticmethod
+    def _match_single(rules: List[Tuple[int, Any]], text: str) -> Optional[int]:
+        if not text:
+            return None
+        for index, compiled in rules:
+            if compiled.search(text):
+                return index
+        return None
+
+    def classify(self, exe_path: str, title: str = "") -> str:
+        """
+        返回应用所属分类，结果按应用记忆化
+
+        Args:
+            exe_path: 可执行文件路径（即应用 ID）
+            title: 窗口标题，仅在存在 title 规则时参与匹配和缓存
+
+        Returns:
+            str: 分类名，未命中时为 DEFAULT_CATEGORY
+        """
+        key = (exe_path, title if self.uses_title else "")
+        category = self._cache.get(key)
+        if category is not None:
+            return category
+
+        candidates = [
+            self._match_trie(exe_path),
+            self._match_regex(self._exe_regex, exe_path),
+            self._match_regex(self._title_regex, title),
+            self._match_single(self._exe_single, exe_path),
+            self._match_single(self._title_single, title),
+        ]
+        hits = [index for index in candidates if index is not None]
+        category = self.rules[min(hits)].category if hits else DEFAULT_CATEGORY
+        self._cache[key] = category
+        return category
+
+    def classify_entry(self, exe_path: str, value: Any) -> str:
+        """
+        按日数据中保存的记录分类
+
+        应用首次出现时的窗口标题保存在记录的 title 字段中，
+        因此重启、重分类历史数据时 title 规则与实时分类的结果一致；没有 title 的旧记录只按路径匹配
+        """
+        title = value.get('title', '') if isinstance(value, dict) else ''
+        return self.classify(exe_path, title if isinstance(title, str) else '')
+
+    def totals(self, day_data: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """按分类汇总一天的数据，跳过不是对象的记录"""
+        result: Dict[str, int] = {}
+        for exe_path, value in day_data.items():
+            if not isinstance(value, dict):
+                continue
+            category = self.classify_entry(exe_path, value)
+            result[category] = result.get(category, 0) + datafile.entry_seconds(value)
+        return result
+
+
+# --- 批量重建分类汇总（多进程），重分类与完整性检查共用 ---
+
+_worker_matcher: Optional[CategoryMatcher] = None
+_worker_validate: Optional[Callable[[Any], List[str]]] = None
+
+# 同一时间只允许一次全量重建
+rebuild_lock = threading.Lock()
+
+
+def _init_worker(rules: List[CategoryRule], validate: Optional[Callable[[Any], List[str]]] = None):
+    """子进程初始化：每个进程只编译一次匹配器"""
+    global _worker_matcher, _worker_validate
+    _worker_matcher = CategoryMatcher(rules)
+    _worker_validate = validate
+
+
+def _summarize_day_file(filename: str, matcher: CategoryMatcher,
+                        validate: Optional[Callable[[Any], List[str]]]) -> Tuple[str, List[str], Optional[Dict[str, int]]]:
+    """读取并校验一个日数据文件，合法时计算分类汇总，返回 (文件名, 错误列表, 汇总)"""
+    try:
+        data = datafile.load_day_file(filename)
+    except (OSError, ValueError) as e:
+        return filename, [f"无法解析: {e}"], None
+    try:
+        errors = validate(data) if validate is not None else []
+        if errors:
+            return filename, errors, None
+        return filename, [], matcher.totals(data)
+    except Exception as e:
+        # 一个文件出错不能中断整个进程池的 map
+        return filename, [f"处理失败: {e!r}"], None
+
+
+def _summarize_in_worker(filename: str) -> Tuple[str, List[str], Optional[Dict[str, int]]]:
+    return _summarize_day_file(filename, _worker_matcher, _worker_validate)
+
+
+def rebuild_rollup(data_path: str, rules: List[CategoryRule], workers: Optional[int] = None,
+                   validate: Optional[Callable[[Any], List[str]]] = None,
+                   on_file: Optional[Callable[[str, List[str], int], None]] = None) -> Dict[str, Dict[str, int]]:
+    """
+    用进程池读取全部日数据文件，按分类汇总后重写汇总文件
+
+    同一进程内的多次调用依次执行。重建期间新出现的日数据文件（如跨天保存的一天）
+    在写入前补算，不会被覆盖掉。
+
+    Args:
+        data_path: 数据目录
+        rules: 分类规则
+        workers: 进程数，默认等于 CPU 核数
+        validate: 可选的校验函数 validate(日数据) -> 错误列表，须可被子进程导入（模块级函数）
+        on_file: 每处理完一个文件调用 on_file(文件名, 错误列表, 文件总数)
+
+    Returns:
+        Dict[str, Dict[str, int]]: {日期: {分类: 秒数}}，出错的文件被跳过
+    """
+    with rebuild_lock:
+        files = list_day_files(data_path)
+        rollup: Dict[str, Dict[str, int]] = {}
+
+        def collect(result):
+            filename, errors, totals = result
+            if not errors:
+                rollup[os.path.splitext(os.path.basename(filename))[0]] = totals
+            if on_file:
+                on_file(filename, errors, len(files))
+
+        if files:
+            chunksize = max(1, len(files) // ((workers or os.cpu_count() or 1) * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(rules, validate)) as pool:
+                for result in pool.map(_summarize_in_worker, files, chunksize=chunksize):
+                    collect(result)
+
+        with rollup_lock:
+            seen = set(files)
+            late = [filename for filename in list_day_files(data_path) if filename not in seen]
+            if late:
+                matcher = CategoryMatcher(rules)
+                files += late
+                for filename in late:
+                    collect(_summarize_day_file(filename, matcher, validate))
+            write_rollup(data_path, rollup)
+    return rollup
+
+
+def list_day_files(data_path: str) -> List[str]:
+    """列出数据目录下所有 YYYY-MM-DD.json 日数据文件（按日期排序）"""
+    result = []
+    if not os.path.isdir(data_path):
+        return result
+    for name in os.listdir(data_path):
+        stem, ext = os.path.splitext(name)
+        if ext != ".json":
+            continue
+        try:
+            dt.datetime.strptime(stem, "%Y-%m-%d")
+        except ValueError:
+            continue
+        result.append(os.path.join(data_path, name))
+    result.sort()
+    return result
+
+
+def reclassify_history(data_path: str, rules: List[CategoryRule], workers: Optional[int] = None,
+                       logger=None, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Dict[str, int]]:
+    """
+    规则变更后，用进程池重新计算全部历史数据的分类汇总，并写入汇总文件
+
+    Args:
+        data_path: 数据目录
+        rules: 分类规则
+        workers: 进程数，默认等于 CPU 核数
+        logger: 可选日志对象
+        progress: 进度回调 progress(已完成, 总数)
+
+    Returns:
+        Dict[str, Dict[str, int]]: {日期: {分类: 秒数}}，无法解析的日期被跳过
+    """
+    done = 0
+
+    def on_file(filename, errors, total):
+        nonlocal done
+        if errors and logger:
+            logger.error(f"重分类时无法读取 {filename}，已跳过: {errors[0]}")
+        done += 1
+        if progress and (done % 100 == 0 or done == total):
+            progress(done, total)
+
+    rollup = rebuild_rollup(data_path, rules, workers, on_file=on_file)
+    if logger:
+        logger.info(f"已重新分类 {len(rollup)} 天的历史数据")
+    return rollup
+
+
+def rollup_path(data_path: str) -> str:
+    return os.path.join(data_path, "rollup", ROLLUP_FILENAME)
+
+
+def write_rollup(data_path: str, rollup: Dict[str, Dict[str, int]]):
+    """原子地写入分类汇总文件"""
+    filename = rollup_path(data_path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp = filename + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(rollup, indent=4, ensure_ascii=False, sort_keys=True))
+    os.replace(tmp, filename)
+
+
+def update_rollup(data_path: str, date_str: str, totals: Dict[str, int]):
+    """把一天的分类汇总写入汇总文件（覆盖该日期原有的记录），汇总文件损坏时从空文件开始"""
+    with rollup_lock:
+        try:
+            rollup = read_rollup(data_path)
+        except ValueError:
+            rollup = {}
+        rollup[date_str] = totals
+        write_rollup(data_path, rollup)
+
+
+def read_rollup(data_path: str) -> Dict[str, Dict[str, int]]:
+    """读取分类汇总文件，不存在时返回空字典"""
+    filename = rollup_path(data_path)
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.loads(f.read())
@@ -0,0 +1,29 @@
+"""
+测试共用的 fixture
+"""
+
+import logging
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def backend_class(monkeypatch):
+    """
+    不依赖 Windows 的 timeManagerBackend 类
+
+    真实的 tmlib 依赖 user32，这里换成只包含新应用初始化时用到的函数的替身，并重新导入 backend
+    """
+    fake_tmlib = types.ModuleType("tmlib")
+    fake_tmlib.get_app_icon_path = lambda exe_path, icon_dir: ""
+    monkeypatch.setitem(sys.modules, "tmlib", fake_tmlib)
+    monkeypatch.delitem(sys.modules, "backend", raising=False)
+    from backend import timeManagerBackend
+    return timeManagerBackend
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("test")
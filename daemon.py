@@ -0,0 +1,72 @@
+"""
+无界面守护进程入口
+
+只运行前台窗口计时与数据保存，不加载 pywebview / pystray / PIL，
+也不启动提供前端页面的 HTTP 服务器；API 服务可用 --api 开启。
+适用于服务器、瘦客户端等只需要记录时间的场景，数据可用 tmcli.py 直接查看。
+
+资源目标（在同一台机器上与 main.py 对比，用 benchmarks/bench_footprint.py 测量）:
+    - 启动时间（导入完成并开始计时）不超过完整界面进程的 1/3
+    - 常驻内存（RSS）不超过 30 MB（不开启 API）
+
+用法:
+    python daemon.py                # 仅计时
+    python daemon.py --api          # 同时提供 127.0.0.1:25673 上的 API
+    python daemon.py --profile      # 运行期间持续采样，退出时把结果写入 ./log
+"""
+
+import argparse
+import signal
+import threading
+
+import tmlib
+import profiler
+import datafile
+from backend import timeManagerBackend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time manager 无界面守护进程")
+    parser.add_argument('--config', default='./config.json', help="配置文件路径")
+    parser.add_argument('--data-path', help="数据目录，默认使用配置文件中的 data_path")
+    parser.add_argument('--api', action='store_true', help="同时启动 API 服务")
+    parser.add_argument('--profile', action='store_true', help="运行期间采样分析，退出时写入 ./log")
+    args = parser.parse_args(argv)
+
+    sampler = None
+    if args.profile:
+        sampler = profiler.SamplingProfiler()
+        sampler.start()
+
+    config = datafile.load_config(args.config)
+    data_path = args.data_path or config.get('data_path', './data')
+    tmlib.initialize_folders([data_path, 'log'])
+
+    backend = timeManagerBackend(None, True, config.get('auto_save_query', 3), data_path,
+                                 config.get('categories'), config.get('budgets'),
+                                 enable_api=args.api, debug_token=config.get('debug_token'))
+
+    stopped = threading.Event()
+
+    def on_signal(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    backend.start()
+    # 主线程只等待退出信号；用带超时的 wait 以便在 Windows 上也能及时响应 Ctrl+C
+    while not stopped.wait(1):
+        pass
+
+    backend.stop_()
+    backend.main_loop_thread.join()
+    backend.save()
+    if sampler:
+        sampler.stop()
+        backend.logger.info(f"采样分析结果: {sampler.save()}")
+    backend.logger.info("守护进程已退出")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+配置文件与日数据文件的读取
+
+计时进程、守护进程、命令行工具、报表、重分类与完整性检查共用这些函数，
+保证各处对缺失、无法读取和损坏文件的处理一致。
+"""
+
+import os
+import json
+import datetime as dt
+from typing import Optional, Dict, Any, Callable
+
+
+def load_config(path: str = './config.json') -> Dict[str, Any]:
+    """读取配置文件，不存在、无法读取或格式错误时返回空配置"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def day_filename(data_path: str, date: dt.date) -> str:
+    """日数据文件路径: <data_path>/YYYY-MM-DD.json"""
+    return os.path.join(data_path, date.strftime("%Y-%m-%d") + ".json")
+
+
+def load_day_file(filename: str) -> Dict[str, Any]:
+    """
+    读取一个日数据文件
+
+    Raises:
+        OSError: 文件不存在或无法读取（如被其他程序占用）
+        ValueError: 内容不是 JSON 对象
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.loads(f.read())
+    if not isinstance(data, dict):
+        raise ValueError("顶层不是对象")
+    return data
+
+
+def read_day(filename: str, on_error: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    报表用的日数据读取，文件不存在、无法读取或损坏时返回空字典
+
+    Args:
+        filename: 日数据文件路径
+        on_error: 可选的错误回调（如 logger.error），文件存在但读取失败时以错误信息调用
+    """
+    if not os.path.exists(filename):
+        return {}
+    try:
+        return load_day_file(filename)
+    except (OSError, ValueError) as e:
+        if on_error:
+            on_error(f"读取文件 {filename} 时出错: {e}")
+        return {}
+
+
+def entry_seconds(value: Any) -> int:
+    """记录中的秒数，兼容旧格式（total_time）；记录格式错误时为 0"""
+    if not isinstance(value, dict):
+        return 0
+    seconds = value.get('totalTime', value.get('total_time', 0))
+    return seconds if isinstance(seconds, int) and not isinstance(seconds, bool) else 0
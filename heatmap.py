@@ -0,0 +1,136 @@
+import base64
+import datetime as dt
+from array import array
+from typing import Optional, Dict, Any, Callable
+
+import datafile
+
+
+# 一天按 15 分钟划分为 96 个时段；每个时段最多 900 秒，用 uint16 存储
+SLOTS = 96
+SLOT_SECONDS = 86400 // SLOTS
+SLOTS_PER_HOUR = SLOTS // 24
+
+
+def new_slots() -> array:
+    return array('H', bytes(SLOTS * 2))
+
+
+def encode_slots(slots: array) -> str:
+    """将时段计数编码为 base64 字符串（uint16，按本机字节序，Windows 上均为小端），写入日数据文件"""
+    return base64.b64encode(slots.tobytes()).decode('ascii')
+
+
+def decode_slots(text: str) -> array:
+    """encode_slots 的逆操作，长度不符时返回全零数组"""
+    slots = array('H')
+    try:
+        slots.frombytes(base64.b64decode(text))
+    except (ValueError, TypeError):
+        return new_slots()
+    if len(slots) != SLOTS:
+        return new_slots()
+    return slots
+
+
+def slot_of(timestamp: float) -> int:
+    """时间戳所在的本地时段序号"""
+    local = dt.datetime.fromtimestamp(timestamp)
+    return (local.hour * 3600 + local.minute * 60 + local.second) // SLOT_SECONDS
+
+
+def day_row(data_path: str, date: dt.date, select: Optional[Callable[[str, Any], bool]] = None,
+            slot_data: Optional[Dict[str, array]] = None):
+    """
+    一天内所有（或选中）应用的时段计数之和
+
+    各应用的时段数组拼接后一次性转为 NumPy 矩阵按列求和，避免逐个时段的 Python 循环。
+
+    Args:
+        data_path: 数据目录
+        date: 日期
+        select: 可选的过滤条件 select(exe路径, 记录)，使用 slot_data 时记录为 None
+        slot_data: 直接使用内存中的时段数据（如今天），{exe路径: 时段数组}
+
+    Returns:
+        numpy.ndarray: 长度为 SLOTS 的 int64 数组，没有数据时为 None
+    """
+    import numpy as np
+
+    if slot_data is not None:
+        chunks = [slots.tobytes() for exe_path, slots in slot_data.items()
+                  if select is None or select(exe_path, None)]
+    else:
+        chunks = []
+        for exe_path, value in datafile.read_day(datafile.day_filename(data_path, date)).items():
+            text = value.get('slots') if isinstance(value, dict) else None
+            if not text or not (select is None or select(exe_path, value)):
+                continue
+            try:
+                chunk = base64.b64decode(text)
+            except (ValueError, TypeError):
+                # slots 字段损坏时只跳过这一条记录
+                continue
+            if len(chunk) == SLOTS * 2:
+                chunks.append(chunk)
+    if not chunks:
+        return None
+    matrix = np.frombuffer(b"".join(chunks), dtype=np.uint16).reshape(-1, SLOTS)
+    return matrix.sum(axis=0, dtype=np.int64)
+
+
+def aggregate(data_path: str, first: dt.date, last: dt.date,
+              select: Optional[Callable[[str, Any], bool]] = None,
+              overrides: Optional[Dict[dt.date, Dict[str, array]]] = None,
+              resolution: str = "hour",
+              row_loader: Optional[Callable[[dt.date], Any]] = None) -> Dict[str, Any]:
+    """
+    汇总 [first, last] 内的时段数据，生成“星期 × 时段”热力图
+
+    每天的时段和由 day_row 计算，所有天组成矩阵后用 np.add.at 按星期累加。
+
+    Args:
+        data_path: 数据目录
+        first: 开始日期（含）
+        last: 结束日期（含）
+        select: 可选的过滤条件，见 day_row
+        overrides: 直接使用内存中的时段数据（如今天），{日期: {exe路径: 时段数组}}
+        resolution: hour（24 列）或 slot（96 列，15 分钟）
+        row_loader: 可选的按日期取时段和的函数（如带缓存的 day_row），不适用于 overrides 中的日期
+
+    Returns:
+        Dict[str, Any]: {"weekday": 7 行（周一开始）, "total": 全部日期合计, "days": 有数据的天数}
+    """
+    import numpy as np
+
+    if row_loader is None:
+        row_loader = lambda date: day_row(data_path, date, select)
+
+    days = (last - first).days + 1
+    day_rows = np.zeros((days, SLOTS), dtype=np.int64)
+    weekdays = np.empty(days, dtype=np.intp)
+    days_with_data = 0
+
+    for i in range(days):
+        date = first + dt.timedelta(days=i)
+        weekdays[i] = date.weekday()
+        if overrides and date in overrides:
+            row = day_row(data_path, date, select, overrides[date])
+        else:
+            row = row_loader(date)
+        if row is None:
+            continue
+        days_with_data += 1
+        day_rows[i] = row
+
+    weekday = np.zeros((7, SLOTS), dtype=np.int64)
+    np.add.at(weekday, weekdays, day_rows)
+    total = day_rows.sum(axis=0)
+    if resolution == "hour":
+        weekday = weekday.reshape(7, 24, SLOTS_PER_HOUR).sum(axis=2)
+        total = total.reshape(24, SLOTS_PER_HOUR).sum(axis=1)
+    return {
+        "weekday": weekday.tolist(),
+        "total": total.tolist(),
+        "days": days_with_data,
+    }
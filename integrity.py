@@ -0,0 +1,144 @@
+"""
+历史数据完整性检查与派生数据重建
+
+用进程池并行扫描数据目录下所有日数据文件，按格式校验，
+报告（可选隔离）损坏的文件，并从原始文件重建分类汇总等派生数据。
+
+用法:
+    python integrity.py                 # 只检查并重建派生数据
+    python integrity.py --quarantine    # 同时把损坏的文件移到 <data_path>/quarantine
+"""
+
+import argparse
+import base64
+import os
+import shutil
+from typing import Optional, Dict, Any, List, Callable
+
+import category
+import datafile
+import heatmap
+
+
+QUARANTINE_DIR = "quarantine"
+
+
+def validate_day(data: Any) -> List[str]:
+    """
+    校验一天的数据，返回错误列表（为空表示合法）
+
+    兼容旧格式（total_time / last_time）；iconPath、category、title、slots 为可选字段
+    """
+    if not isinstance(data, dict):
+        return ["顶层不是对象"]
+    errors = []
+    for exe_path, value in data.items():
+        if not isinstance(value, dict):
+            errors.append(f"{exe_path}: 记录不是对象")
+            continue
+        total = value.get('totalTime', value.get('total_time'))
+        last = value.get('lastTime', value.get('last_time'))
+        if not isinstance(total, int) or isinstance(total, bool) or total < 0:
+            errors.append(f"{exe_path}: totalTime 无效")
+        elif total > 86400:
+            errors.append(f"{exe_path}: totalTime 超过一天")
+        if not isinstance(last, (int, float)) or isinstance(last, bool):
+            errors.append(f"{exe_path}: lastTime 无效")
+        for key in ('iconPath', 'category', 'title'):
+            if key in value and not isinstance(value[key], str):
+                errors.append(f"{exe_path}: {key} 不是字符串")
+        if 'slots' in value:
+            try:
+                if len(base64.b64decode(value['slots'], validate=True)) != heatmap.SLOTS * 2:
+                    errors.append(f"{exe_path}: slots 长度错误")
+            except (ValueError, TypeError):
+                errors.append(f"{exe_path}: slots 不是有效的 base64")
+    return errors
+
+
+def quarantine_file(data_path: str, filename: str) -> str:
+    """把损坏的文件移到隔离目录，返回新路径（不会覆盖已隔离的同名文件）"""
+    folder = os.path.join(data_path, QUARANTINE_DIR)
+    os.makedirs(folder, exist_ok=True)
+    target = os.path.join(folder, os.path.basename(filename))
+    index = 1
+    while os.path.exists(target):
+        target = os.path.join(folder, f"{os.path.basename(filename)}.{index}")
+        index += 1
+    shutil.move(filename, target)
+    return target
+
+
+def check_history(data_path: str, rules: List[category.CategoryRule], workers: Optional[int] = None,
+                  quarantine: bool = False, progress: Optional[Callable[[int, int], None]] = None,
+                  logger=None) -> Dict[str, Any]:
+    """
+    并行检查全部日数据文件，并从合法文件重建分类汇总
+
+    Args:
+        data_path: 数据目录
+        rules: 分类规则
+        workers: 进程数，默认等于 CPU 核数
+        quarantine: 是否隔离损坏的文件
+        progress: 进度回调 progress(已完成, 总数)
+        logger: 可选日志对象
+
+    Returns:
+        Dict[str, Any]: 检查报告
+    """
+    corrupt = []
+    done = 0
+    if progress:
+        progress(0, len(category.list_day_files(data_path)))
+
+    def on_file(filename, errors, total):
+        nonlocal done
+        if errors:
+            item = {"file": filename, "errors": errors[:20]}
+            if quarantine:
+                item["quarantined"] = quarantine_file(data_path, filename)
+            corrupt.append(item)
+            if logger:
+                logger.error(f"损坏的数据文件 {filename}: {errors[:3]}")
+        done += 1
+        if progress and (done % 100 == 0 or done == total):
+            progress(done, total)
+
+    rollup = category.rebuild_rollup(data_path, rules, workers, validate_day, on_file)
+    report = {
+        "checked": done,
+        "ok": done - len(corrupt),
+        "corrupt": corrupt,
+        "rollupDays": len(rollup),
+    }
+    if logger:
+        logger.info(f"完整性检查完成: 共 {report['checked']} 个文件，损坏 {len(corrupt)} 个")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time manager 历史数据完整性检查")
+    parser.add_argument('--config', default='./config.json', help="配置文件路径")
+    parser.add_argument('--data-path', help="数据目录，默认使用配置文件中的 data_path")
+    parser.add_argument('--quarantine', action='store_true', help="把损坏的文件移到隔离目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数")
+    args = parser.parse_args(argv)
+
+    config = datafile.load_config(args.config)
+    data_path = args.data_path or config.get('data_path', './data')
+
+    def show_progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    report = check_history(data_path, category.parse_rules(config.get('categories')), args.workers,
+                           args.quarantine, show_progress)
+    print()
+    for item in report["corrupt"]:
+        print(f"{item['file']}: {'; '.join(item['errors'][:3])}")
+        if "quarantined" in item:
+            print(f"    已隔离到 {item['quarantined']}")
+    print(f"共 {report['checked']} 个文件，正常 {report['ok']} 个，损坏 {len(report['corrupt'])} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,42 @@ import pystray
 from PIL import Image
 import threading
 import os
-import json
 import http.server
 import socketserver
 from functools import partial
 import logging as lg
 import tmlib
 import datetime as dt
+import multiprocessing
+import profiler
+import datafile
 
 from backend import timeManagerBackend
 
 
+FRONTEND_URL = "http://localhost:50000"
+
 
 class WebViewApp(object):
-    def __init__(self,iconPath):
+    def __init__(self,iconPath,sampler=None):
         #initialize
         
-        if os.path.exists('./config.json'):
-            try:
-                self.config=json.load(open('./config.json'))
-            except json.JSONDecodeError:
-                self.config={}
+        self.config=datafile.load_config('./config.json')
         tmlib.initialize_folders(['data',
                                   'log'])
 
         self.window=None
         self.icon_path=iconPath
+        # 托盘模式：窗口隐藏超过 tray_unload_after 秒后卸载页面，释放渲染进程内存。
+        # 每次隐藏、显示时 page_seq 加一，过期的挂起或卸载操作直接放弃。
+        # page_lock 只保护这些状态，GUI 线程也会短暂获取；
+        # page_action_lock 串行执行对页面的操作（这些调用要等待 GUI 线程），GUI 线程从不获取
+        self.page_lock=threading.Lock()
+        self.page_action_lock=threading.Lock()
+        self.page_seq=0
+        self.unload_timer=None
+        self.page_unloaded=False
+        self.sampler=sampler
         self.logger_init()
         self.logger.info('Object Initializing...')
         pass
@@ -96,7 +106,7 @@ class WebViewApp(object):
         self.logger.info('create window')
         self.window = webview.create_window(
             "Time Manager Py", 
-            "http://localhost:50000", # URL 末尾空格已移除
+            FRONTEND_URL,
             width=800, 
             height=600
         )
@@ -112,9 +122,65 @@ class WebViewApp(object):
         返回 False 以阻止窗口真正关闭。
         """
         self.window.hide()
+        with self.page_lock:
+            self.page_seq += 1
+            seq = self.page_seq
+            if self.unload_timer:
+                self.unload_timer.cancel()
+                self.unload_timer = None
+            # 隐藏期间前端停止轮询，超时后再卸载整个页面
+            unload_after = self.config.get('tray_unload_after', 60)
+            if unload_after is not None and unload_after >= 0:
+                self.unload_timer = threading.Timer(unload_after, self.unload_page, args=(seq,))
+                self.unload_timer.daemon = True
+                self.unload_timer.start()
+        # closing 事件在 GUI 线程中同步执行，而 evaluate_js 要等待同一线程上的回调，
+        # 在这里直接调用会死锁，因此放到单独的线程中执行
+        threading.Thread(target=self.suspend_page, args=(seq,), daemon=True).start()
         # 返回 False 阻止 webview 窗口真正关闭
         return False
 
+    def suspend_page(self, seq):
+        """通知前端停止轮询；窗口已被重新显示时放弃"""
+        with self.page_action_lock:
+            with self.page_lock:
+                if seq != self.page_seq:
+                    return
+            self.window.evaluate_js("window.tmSuspend && window.tmSuspend()")
+
+    def unload_page(self, seq):
+        """
+        卸载隐藏窗口中的页面
+
+        导航到空白页会释放前端的 DOM 与 JS 堆并停止一切轮询，
+        窗口本身保留，重新显示时只需重新加载页面（前端会先用上次的快照渲染）。
+        cancel() 无法阻止已经开始执行的回调，因此在锁内重新确认窗口仍处于这次隐藏中。
+        """
+        with self.page_action_lock:
+            with self.page_lock:
+                if seq != self.page_seq:
+                    return
+                self.unload_timer = None
+                self.page_unloaded = True
+            self.logger.info("窗口隐藏超时，卸载页面")
+            self.window.load_url("about:blank")
+
+    def show_window(self):
+        """从托盘恢复窗口：取消卸载计时，页面已卸载时重新加载，否则恢复轮询"""
+        with self.page_action_lock:
+            with self.page_lock:
+                self.page_seq += 1
+                if self.unload_timer:
+                    self.unload_timer.cancel()
+                    self.unload_timer = None
+                reload = self.page_unloaded
+                self.page_unloaded = False
+            if reload:
+                self.window.load_url(FRONTEND_URL)
+            else:
+                self.window.evaluate_js("window.tmResume && window.tmResume()")
+            self.window.show()
+
 
     def quit_app(self, icon_obj, item):
         self.logger.info("退出窗口")
@@ -123,6 +189,9 @@ class WebViewApp(object):
         self.httpd.server_close()
         self.logger.info("已退出")
         self.backend.stop_()
+        if self.sampler:
+            self.sampler.stop()
+            self.logger.info(f"采样分析结果: {self.sampler.save()}")
         os._exit(0)
 
 
@@ -134,7 +203,7 @@ class WebViewApp(object):
             当托盘图标被左键单击时调用此方法。
             """
             self.logger.info("左键单击托盘图标，显示窗口。")
-            self.window.show()
+            self.show_window()
         self.menu = pystray.Menu(
             pystray.MenuItem('显示 (Show)', on_tray_icon_clicked),
             pystray.MenuItem('退出 (Exit)', self.quit_app)
@@ -159,12 +228,24 @@ class WebViewApp(object):
         self.icon.run()
 
 
+    def on_budget_event(self, event):
+        """预算事件通过托盘通知提醒用户"""
+        if not getattr(self, 'icon', None):
+            return
+        level = '已超出' if event['level'] == 'exceeded' else '即将用完'
+        period = '今日' if event['period'] == 'daily' else '本周'
+        self.icon.notify(f"{event['name']} {period}时间预算{level}：已用 {event['used'] // 60} 分钟 / {event['limit'] // 60} 分钟",
+                         "time manager")
+
     def run(self):
         if not self.__init_backend():
             return False
         
         self.logger.info("初始化成功")
-        self.backend=timeManagerBackend(self.logger,True,self.config['auto_save_query'],self.config['data_path'])
+        self.backend=timeManagerBackend(self.logger,True,self.config['auto_save_query'],self.config['data_path'],
+                                       self.config.get('categories'),self.config.get('budgets'),
+                                       debug_token=self.config.get('debug_token'))
+        self.backend.add_event_listener(self.on_budget_event)
         self.logger.info("启动后端服务")
         
         #图标线程
@@ -179,6 +260,10 @@ class WebViewApp(object):
         self.create_window()
 
 
-main_webview = WebViewApp('./icon.ico')
+if __name__ == "__main__":
+    # 历史数据重分类使用进程池，打包后的 exe 需要 freeze_support，子进程也不能重复启动界面
+    multiprocessing.freeze_support()
+    # --profile：整个运行期间采样，退出时把结果写入 ./log
+    main_webview = WebViewApp('./icon.ico', profiler.start_from_argv())
 
-main_webview.run()
\ No newline at end of file
+    main_webview.run()
\ No newline at end of file
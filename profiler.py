@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import threading
+import datetime as dt
+from typing import Optional, Dict, List, Tuple, Callable
+
+
+# 默认采样的线程：计时主循环、自动保存、uvicorn 事件循环，以及执行同步路由的 AnyIO 工作线程
+DEFAULT_THREADS = ("main_loop", "auto_save", "backend", "AnyIO worker thread")
+
+
+def default_thread_filter(thread: threading.Thread) -> bool:
+    return thread.name.startswith(DEFAULT_THREADS)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+class SamplingProfiler(object):
+    """
+    低开销的采样分析器
+
+    后台线程按固定间隔读取 sys._current_frames()，只记录目标线程的调用栈，
+    不使用 sys.setprofile，因此被采样的线程本身没有额外开销。
+    结果可导出为 collapsed stack 格式（可直接交给 flamegraph.pl / speedscope），
+    并统计自身耗时与累计耗时最高的函数。
+    """
+
+    def __init__(self, interval: float = 0.01,
+                 thread_filter: Callable[[threading.Thread], bool] = default_thread_filter):
+        self.interval = interval
+        self.thread_filter = thread_filter
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.time() - self.started_at
+
+    def run(self, seconds: float):
+        """阻塞采样 seconds 秒"""
+        self.start()
+        self._stop.wait(seconds)
+        self.stop()
+
+    def _run(self):
+        targets: Dict[int, str] = {}
+        refresh_at = 0.0
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            if now >= refresh_at:
+                # 线程列表每秒刷新一次，uvicorn 的工作线程是按需创建的
+                targets = {thread.ident: thread.name for thread in threading.enumerate()
+                           if thread.ident and self.thread_filter(thread)}
+                refresh_at = now + 1.0
+            frames = sys._current_frames()
+            for ident, name in targets.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(name)
+                stack.reverse()
+                key = tuple(stack)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            del frames
+
+    def collapsed(self) -> str:
+        """collapsed stack 格式：每行“线程;外层函数;...;内层函数 次数”"""
+        return "".join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]))
+
+    def top(self, n: int = 30) -> List[Dict[str, object]]:
+        """按自身采样数排序的函数列表，含累计采样数"""
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for label in set(stack[1:]):
+                total[label] = total.get(label, 0) + count
+        names = sorted(total, key=lambda label: (own.get(label, 0), total[label]), reverse=True)[:n]
+        return [{"function": label, "self": own.get(label, 0), "total": total[label]} for label in names]
+
+    def report(self, n: int = 30) -> str:
+        """可读的文本报告"""
+        lines = [f"采样 {self.samples} 次，间隔 {self.interval * 1000:.0f} ms，时长 {self.duration:.1f} s",
+                 f"{'self':>8} {'total':>8}  function"]
+        for item in self.top(n):
+            lines.append(f"{item['self']:>8} {item['total']:>8}  {item['function']}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, folder: str = "./log", prefix: str = "profile") -> Tuple[str, str]:
+        """
+        将结果写入 folder
+
+        Returns:
+            Tuple[str, str]: collapsed stack 文件路径与文本报告路径
+        """
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, f"{prefix}-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        with open(stem + ".collapsed", 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        with open(stem + ".txt", 'w', encoding='utf-8') as f:
+            f.write(self.report())
+        return stem + ".collapsed", stem + ".txt"
+
+
+def start_from_argv(argv: Optional[List[str]] = None) -> Optional[SamplingProfiler]:
+    """命令行带 --profile 时启动整个运行期间的采样，退出时调用 SamplingProfiler.stop 与 save"""
+    if '--profile' not in (sys.argv if argv is None else argv):
+        return None
+    profiler = SamplingProfiler()
+    profiler.start()
+    return profiler
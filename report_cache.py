@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Hashable, Tuple
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """
+    文件版本：(修改时间纳秒, 大小)，文件不存在时为 None
+
+    只调用 stat，不读取文件内容；文件被重写、迁移或隔离后签名随之变化
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ReportCache(object):
+    """
+    报表计算结果的 LRU 缓存
+
+    每个条目保存计算时的版本号，取用时版本号不一致即视为失效并重新计算。
+    已结束的日期用文件签名作版本，内容不变就一直有效；
+    今天的数据用后端的 data_version 作版本，计时一变即失效。
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Hashable, compute: Callable[[], Any]) -> Any:
+        """返回 key 在 version 下的结果，没有或已过期时调用 compute 计算并缓存"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # 计算可能较慢（读文件），不持有锁
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": self.hits / total if total else 0.0,
+            }
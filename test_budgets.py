@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+测试时间预算功能
+"""
+
+import budgets
+
+
+def test_budget_events():
+    """测试预警与超限事件只触发一次"""
+    events = []
+    rules = budgets.parse_rules([
+        {"target": "app", "name": "a.exe", "period": "daily", "limit": 10, "warn": [0.5]},
+        {"target": "category", "name": "games", "period": "weekly", "limit": 4},
+    ])
+    engine = budgets.BudgetEngine(rules, events.append)
+
+    for _ in range(12):
+        engine.tick("a.exe", "work")
+    assert [e["level"] for e in events] == ["warning", "exceeded"]
+
+    events.clear()
+    engine.tick("b.exe", "games", seconds=5)
+    assert [(e["name"], e["level"]) for e in events] == [("games", "warning"), ("games", "exceeded")]
+
+
+def test_load_usage():
+    """测试根据已有数据初始化已用时间，已越过的阈值不补发"""
+    events = []
+    rules = budgets.parse_rules([
+        {"target": "category", "name": "games", "period": "weekly", "limit": 100},
+        {"target": "category", "name": "games", "period": "daily", "limit": 100},
+    ])
+    engine = budgets.BudgetEngine(rules, events.append)
+    classify = lambda exe_path, value: "games"
+
+    # 旧格式与不是对象的记录（损坏的历史文件）不会中断初始化
+    engine.load_usage({"a.exe": {"totalTime": 30}}, [{"b.exe": {"total_time": 60}, "c.exe": 5}], classify)
+    weekly, daily = engine.status()
+    assert weekly["used"] == 90 and weekly["nextTrigger"] == 100
+    assert daily["used"] == 30 and daily["remaining"] == 70
+    assert events == []
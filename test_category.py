@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+测试应用分类功能
+"""
+
+import json
+import os
+import tempfile
+
+import category
+
+
+RULES = category.parse_rules([
+    {"category": "games", "type": "prefix", "pattern": "D:\\Games"},
+    {"category": "work", "type": "glob", "pattern": "*\\code.exe"},
+    {"category": "browsing", "type": "regex", "field": "title", "pattern": "youtube|bilibili"},
+    {"category": "browsing", "type": "regex", "pattern": r"(chrome|firefox)\.exe$"},
+    {"category": "tools", "type": "prefix", "pattern": "C:\\Program Files"},
+])
+
+
+def test_classify_rules():
+    """测试各类规则的匹配与优先级"""
+    matcher = category.CategoryMatcher(RULES)
+
+    assert matcher.classify("d:\\games\\steam\\game.exe") == "games"
+    assert matcher.classify("C:\\Users\\me\\AppData\\Code.exe") == "work"
+    assert matcher.classify("C:\\Program Files\\Google\\chrome.exe") == "browsing"
+    assert matcher.classify("C:\\Program Files\\7-Zip\\7zFM.exe") == "tools"
+    assert matcher.classify("C:\\Program Files\\foo.exe", "YouTube - video") == "browsing"
+    assert matcher.classify("E:\\other.exe") == category.DEFAULT_CATEGORY
+    # 前缀必须按完整路径分量匹配
+    assert matcher.classify("D:\\GamesBackup\\x.exe") == category.DEFAULT_CATEGORY
+
+
+def test_reclassify_history():
+    """测试历史数据批量重分类"""
+    with tempfile.TemporaryDirectory() as data_path:
+        day = {
+            "D:\\Games\\a.exe": {"totalTime": 10, "lastTime": 0.0},
+            "C:\\x\\code.exe": {"totalTime": 5, "lastTime": 0.0},
+        }
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(day))
+        with open(os.path.join(data_path, "2024-01-02.json"), 'w', encoding='utf-8') as f:
+            f.write("{broken")
+
+        rollup = category.reclassify_history(data_path, RULES, workers=2)
+
+        assert rollup == {"2024-01-01": {"games": 10, "work": 5}}
+        assert category.read_rollup(data_path) == rollup
+
+
+def test_title_rules_from_stored_entry():
+    """测试 title 规则可以由日数据中保存的标题重新计算"""
+    rules = category.parse_rules([{"category": "video", "type": "regex", "field": "title", "pattern": "youtube"}])
+    matcher = category.CategoryMatcher(rules)
+    entry = {"totalTime": 7, "lastTime": 0.0, "title": "YouTube - Google Chrome"}
+
+    assert matcher.classify_entry("C:\\chrome.exe", entry) == "video"
+    assert matcher.classify_entry("C:\\chrome.exe", {"totalTime": 1}) == category.DEFAULT_CATEGORY
+    with tempfile.TemporaryDirectory() as data_path:
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"C:\\chrome.exe": entry}))
+        assert category.reclassify_history(data_path, rules, workers=1) == {"2024-01-01": {"video": 7}}
+
+
+def test_backend_restart_keeps_title_category(backend_class, logger):
+    """测试重启后 title 规则得到的分类与分类总时长不变"""
+    rules = [{"category": "video", "field": "title", "type": "regex", "pattern": "youtube"}]
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, rules, enable_api=False)
+        backend._add_app("C:\\chrome.exe", "YouTube - Google Chrome")
+        backend.main_data["C:\\chrome.exe"]["totalTime"] = 5
+        backend._rebuild_day_indexes()
+        backend.save()
+        backend.timeline.close()
+        assert backend.category_totals == {"video": 5}
+
+        restarted = backend_class(logger, False, 0, data_path, rules, enable_api=False)
+        restarted.timeline.close()
+        assert restarted.main_data["C:\\chrome.exe"]["category"] == "video"
+        assert restarted.category_totals == {"video": 5}
+
+
+def test_regex_rules_not_mergeable():
+    """测试含全局内联标志、反向引用或命名组的正则规则"""
+    rules = category.parse_rules([
+        {"category": "steam", "type": "regex", "pattern": "(?i)steam"},
+        {"category": "double", "type": "regex", "pattern": r"\\(a)\1\.exe$"},
+        {"category": "named1", "type": "regex", "pattern": r"(?P<x>foo)bar"},
+        {"category": "named2", "type": "regex", "pattern": r"(?P<x>foo)baz"},
+        {"category": "plain", "type": "regex", "pattern": r"\.exe$"},
+    ])
+    matcher = category.CategoryMatcher(rules)
+
+    assert matcher.classify("C:\\Steam\\steam.exe") == "steam"
+    assert matcher.classify("C:\\x\\aa.exe") == "double"
+    assert matcher.classify("C:\\x\\ab.exe") == "plain"
+    assert matcher.classify("C:\\foobaz.exe") == "named2"
+
+
+def test_invalid_regex_rule():
+    """测试无效的正则在解析配置时给出明确错误"""
+    try:
+        category.parse_rules([{"category": "bad", "type": "regex", "pattern": "(unclosed"}])
+    except ValueError as e:
+        assert "(unclosed" in str(e)
+    else:
+        assert False, "应当抛出 ValueError"
+
+
+def test_update_rollup():
+    """测试跨天时追加一天的分类汇总"""
+    with tempfile.TemporaryDirectory() as data_path:
+        category.update_rollup(data_path, "2024-01-01", {"work": 10})
+        category.update_rollup(data_path, "2024-01-02", {"game": 5})
+        category.update_rollup(data_path, "2024-01-01", {"work": 20})
+        assert category.read_rollup(data_path) == {"2024-01-01": {"work": 20}, "2024-01-02": {"game": 5}}
+
+        with open(category.rollup_path(data_path), 'w', encoding='utf-8') as f:
+            f.write("{broken")
+        category.update_rollup(data_path, "2024-01-03", {"work": 1})
+        assert category.read_rollup(data_path) == {"2024-01-03": {"work": 1}}
+
+
+def test_rebuild_rollup_keeps_late_days():
+    """测试重建期间新保存的日数据也写入汇总"""
+    with tempfile.TemporaryDirectory() as data_path:
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"D:\\Games\\a.exe": {"totalTime": 10, "lastTime": 0.0}}))
+
+        def save_new_day(filename, errors, total):
+            late = os.path.join(data_path, "2024-01-02.json")
+            if not os.path.exists(late):
+                with open(late, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({"C:\\x\\code.exe": {"totalTime": 5, "lastTime": 0.0}}))
+
+        rollup = category.rebuild_rollup(data_path, RULES, workers=1, on_file=save_new_day)
+
+        assert rollup == {"2024-01-01": {"games": 10}, "2024-01-02": {"work": 5}}
+        assert category.read_rollup(data_path) == rollup
+
+
+def test_reclassify_skips_invalid_entries():
+    """测试不是对象的记录被跳过，不会中断整个重分类"""
+    with tempfile.TemporaryDirectory() as data_path:
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"a.exe": 5, "D:\\Games\\b.exe": {"totalTime": 10, "lastTime": 0.0}}))
+
+        progress = []
+        rollup = category.reclassify_history(data_path, RULES, workers=1,
+                                             progress=lambda done, total: progress.append((done, total)))
+
+        assert rollup == {"2024-01-01": {"games": 10}}
+        assert category.read_rollup(data_path) == rollup
+        assert progress == [(1, 1)]
+
+
+def test_backend_day_file_without_category(backend_class, logger):
+    """测试分类不写入日数据文件，报表按当前规则重新计算旧文件中的分类"""
+    rules = [{"category": "video", "field": "title", "type": "regex", "pattern": "youtube"}]
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, rules, enable_api=False)
+        backend.timeline.close()
+        backend._add_app("C:\\chrome.exe", "YouTube - Google Chrome")
+        backend.save()
+
+        with open(os.path.join(data_path, backend.current_date.strftime("%Y-%m-%d") + ".json"),
+                  'r', encoding='utf-8') as f:
+            saved = json.loads(f.read())
+        assert "category" not in saved["C:\\chrome.exe"]
+        assert backend.main_data["C:\\chrome.exe"]["category"] == "video"
+
+        stale = {"C:\\chrome.exe": {"totalTime": 3, "lastTime": 0.0, "title": "YouTube", "category": "old"}}
+        assert backend._report_day(stale)["C:\\chrome.exe"]["category"] == "video"
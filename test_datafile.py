@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+测试配置文件与日数据文件的读取
+"""
+
+import datetime as dt
+import os
+import tempfile
+
+import datafile
+
+
+def test_load_config():
+    """测试配置文件不存在、格式错误或不是对象时返回空配置"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "config.json")
+        assert datafile.load_config(path) == {}
+        for content, expected in (('{"data_path": "./d"}', {"data_path": "./d"}), ("{broken", {}), ("[1]", {})):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            assert datafile.load_config(path) == expected
+
+
+def test_read_day():
+    """测试日数据读取在各种损坏情况下返回空字典并报告错误"""
+    with tempfile.TemporaryDirectory() as data_path:
+        filename = datafile.day_filename(data_path, dt.date(2024, 1, 1))
+        errors = []
+        assert datafile.read_day(filename, errors.append) == {}
+        assert errors == []
+
+        for content in ("{broken", "[1, 2]"):
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(content)
+            assert datafile.read_day(filename, errors.append) == {}
+        assert len(errors) == 2
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('{"a.exe": {"totalTime": 3, "lastTime": 0}}')
+        assert datafile.read_day(filename) == {"a.exe": {"totalTime": 3, "lastTime": 0}}
+
+
+def test_entry_seconds():
+    """测试记录秒数兼容旧格式，格式错误时为 0"""
+    assert datafile.entry_seconds({"totalTime": 5}) == 5
+    assert datafile.entry_seconds({"total_time": 7}) == 7
+    assert datafile.entry_seconds({"totalTime": "12"}) == 0
+    assert datafile.entry_seconds(5) == 0
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试时段计数与热力图汇总
+"""
+
+import datetime as dt
+import json
+import os
+import tempfile
+
+import heatmap
+
+
+def test_slots_roundtrip():
+    """测试时段计数的编码与解码"""
+    slots = heatmap.new_slots()
+    slots[0] = 900
+    slots[95] = 1
+    assert heatmap.decode_slots(heatmap.encode_slots(slots)) == slots
+    assert heatmap.decode_slots("broken") == heatmap.new_slots()
+
+
+def test_aggregate():
+    """测试按星期与小时汇总"""
+    monday = dt.date(2024, 1, 1)
+    a = heatmap.new_slots()
+    a[0] = 10
+    a[5] = 20
+    b = heatmap.new_slots()
+    b[1] = 5
+    with tempfile.TemporaryDirectory() as data_path:
+        day = {
+            "a.exe": {"totalTime": 30, "lastTime": 0.0, "slots": heatmap.encode_slots(a)},
+            "b.exe": {"totalTime": 5, "lastTime": 0.0, "slots": heatmap.encode_slots(b)},
+            "old.exe": {"totalTime": 1, "lastTime": 0.0},
+        }
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(day))
+
+        result = heatmap.aggregate(data_path, monday, monday + dt.timedelta(days=1),
+                                   overrides={monday + dt.timedelta(days=1): {"a.exe": a}})
+        assert result["days"] == 2
+        assert result["weekday"][0][0] == 15 and result["weekday"][0][1] == 20
+        assert result["weekday"][1][0] == 10
+        assert result["total"][:2] == [25, 40]
+
+        result = heatmap.aggregate(data_path, monday, monday, select=lambda exe, value: exe == "b.exe",
+                                   resolution="slot")
+        assert result["total"][1] == 5 and sum(result["total"]) == 5
+
+
+def test_day_row_skips_bad_slots():
+    """测试 slots 字段损坏的记录被跳过，不影响同一天的其他记录"""
+    a = heatmap.new_slots()
+    a[3] = 7
+    with tempfile.TemporaryDirectory() as data_path:
+        day = {
+            "a.exe": {"totalTime": 7, "lastTime": 0.0, "slots": heatmap.encode_slots(a)},
+            "bad.exe": {"totalTime": 1, "lastTime": 0.0, "slots": "abc"},
+            "short.exe": {"totalTime": 1, "lastTime": 0.0, "slots": "AAAA"},
+        }
+        with open(os.path.join(data_path, "2024-01-01.json"), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(day))
+
+        row = heatmap.day_row(data_path, dt.date(2024, 1, 1))
+        assert row[3] == 7 and int(row.sum()) == 7
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+测试历史数据完整性检查
+"""
+
+import datetime as dt
+import json
+import os
+import tempfile
+
+import pytest
+
+import category
+import heatmap
+import integrity
+
+
+def test_validate_day():
+    """测试数据格式校验"""
+    assert integrity.validate_day({"a.exe": {"totalTime": 1, "lastTime": 0.0,
+                                             "slots": heatmap.encode_slots(heatmap.new_slots())}}) == []
+    assert integrity.validate_day({"a.exe": {"total_time": 1, "last_time": 0}}) == []
+    assert integrity.validate_day([]) == ["顶层不是对象"]
+    assert len(integrity.validate_day({"a.exe": {"totalTime": -1, "lastTime": "x"}})) == 2
+    assert integrity.validate_day({"a.exe": {"totalTime": 1, "lastTime": 0, "slots": "AAAA"}})
+
+
+def test_check_history_quarantine():
+    """测试并行检查、隔离损坏文件并重建分类汇总"""
+    rules = category.parse_rules([{"category": "games", "type": "prefix", "pattern": "D:\\Games"}])
+    with tempfile.TemporaryDirectory() as data_path:
+        files = {
+            "2024-01-01.json": json.dumps({"D:\\Games\\a.exe": {"totalTime": 10, "lastTime": 0.0}}),
+            "2024-01-02.json": "{not json",
+            "2024-01-03.json": json.dumps({"x.exe": {"totalTime": "1", "lastTime": 0.0}}),
+        }
+        for name, content in files.items():
+            with open(os.path.join(data_path, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        progress = []
+        report = integrity.check_history(data_path, rules, workers=2, quarantine=True,
+                                         progress=lambda done, total: progress.append((done, total)))
+
+        assert report["checked"] == 3 and report["ok"] == 1
+        assert sorted(os.listdir(os.path.join(data_path, integrity.QUARANTINE_DIR))) == \
+            ["2024-01-02.json", "2024-01-03.json"]
+        assert category.read_rollup(data_path) == {"2024-01-01": {"games": 10}}
+        assert progress[0] == (0, 3) and progress[-1] == (3, 3)
+
+
+def test_backend_quarantines_invalid_day(backend_class, logger):
+    """测试能解析但内容不合法的今日数据被隔离，后端照常启动"""
+    with tempfile.TemporaryDirectory() as data_path:
+        filename = os.path.join(data_path, dt.date.today().strftime("%Y-%m-%d") + ".json")
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"a.exe": {"totalTime": "12", "lastTime": 0.0}}))
+
+        backend = backend_class(logger, False, 0, data_path, enable_api=False)
+        backend.timeline.close()
+
+        assert backend.main_data == {}
+        assert not os.path.exists(filename)
+        assert os.listdir(os.path.join(data_path, integrity.QUARANTINE_DIR)) == [os.path.basename(filename)]
+
+
+def test_backend_refuses_unreadable_day(backend_class, logger):
+    """测试今日数据文件无法读取时不带着空数据启动，原文件保持不变"""
+    with tempfile.TemporaryDirectory() as data_path:
+        # 目录代替文件，读取时抛出 OSError
+        filename = os.path.join(data_path, dt.date.today().strftime("%Y-%m-%d") + ".json")
+        os.makedirs(filename)
+
+        with pytest.raises(OSError):
+            backend_class(logger, False, 0, data_path, enable_api=False)
+        assert os.path.isdir(filename)
+        assert not os.path.exists(os.path.join(data_path, integrity.QUARANTINE_DIR))
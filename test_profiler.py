@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+测试采样分析器
+"""
+
+import tempfile
+import threading
+
+import profiler
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler():
+    """测试只采样目标线程，并生成 collapsed stack 与函数排行"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name="main_loop", daemon=True)
+    worker.start()
+    sampler = profiler.SamplingProfiler(interval=0.002)
+    sampler.run(0.3)
+    stop.set()
+    worker.join()
+
+    assert sampler.samples > 0
+    assert all(stack[0] == "main_loop" for stack in sampler.stacks)
+    assert "test_profiler.py:busy" in [item["function"] for item in sampler.top()]
+    with tempfile.TemporaryDirectory() as folder:
+        collapsed_path, report_path = sampler.save(folder)
+        with open(collapsed_path, encoding='utf-8') as f:
+            assert f.readline().startswith("main_loop;")
+
+
+def test_backend_debug_token(backend_class, logger):
+    """测试调试令牌按字节比较：非 ASCII 请求头与数字令牌不会抛出异常"""
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, enable_api=False, debug_token=12345)
+        backend.timeline.close()
+
+        assert backend._check_debug_token("12345")
+        assert not backend._check_debug_token("1234")
+        assert not backend._check_debug_token("令牌")
+        assert not backend._check_debug_token(None)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+测试报表缓存
+"""
+
+import os
+import tempfile
+
+import report_cache
+
+
+def test_cache_versions_and_lru():
+    """测试版本失效、LRU 淘汰与命中率统计"""
+    cache = report_cache.ReportCache(maxsize=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get("a", 1, lambda: compute("a1")) == "a1"
+    assert cache.get("a", 1, lambda: compute("a1 again")) == "a1"
+    assert cache.get("a", 2, lambda: compute("a2")) == "a2"
+    cache.get("b", 1, lambda: compute("b"))
+    cache.get("c", 1, lambda: compute("c"))
+    assert cache.get("a", 2, lambda: compute("a2 evicted")) == "a2 evicted"
+
+    stats = cache.stats()
+    assert calls == ["a1", "a2", "b", "c", "a2 evicted"]
+    assert stats["hits"] == 1 and stats["misses"] == 5 and stats["size"] == 2
+    assert stats["evictions"] == 2
+
+
+def test_file_signature():
+    """测试文件被重写或删除后签名变化"""
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "2024-01-01.json")
+        assert report_cache.file_signature(filename) is None
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        first = report_cache.file_signature(filename)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('{"a.exe": {}}')
+        assert report_cache.file_signature(filename) != first
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试前台会话时间线功能
+"""
+
+import datetime as dt
+import os
+import tempfile
+
+import timeline
+
+
+def test_timeline_queries():
+    """测试时间线的追加、持久化与查询"""
+    date = dt.date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as data_path:
+        store = timeline.TimelineStore(data_path, date, writable=True)
+        store.append(100, 110, "a.exe", "A")
+        store.append(110, 150, "b.exe", "B")
+        store.append(160, 170, "a.exe", "A2")
+        store.close()
+
+        store = timeline.TimelineStore(data_path, date)
+        assert len(store) == 3
+        assert store.at(120)["exe"] == "b.exe"
+        assert store.at(155) is None
+        assert [i["title"] for i in store.between(105, 161)] == ["A", "B", "A2"]
+        assert store.count(0, 1000) == 3 and store.switch_count(0, 1000) == 2
+        assert store.longest(0, 1000, 1)[0]["exe"] == "b.exe"
+        # 按与查询区间相交的长度排序
+        assert store.longest(100, 115, 1)[0]["exe"] == "a.exe"
+
+
+def test_backend_date_switch_then_save(backend_class, logger):
+    """测试跨天切换时间线后自动保存不会刷新已关闭的文件"""
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, enable_api=False)
+        previous = backend.timeline
+        backend.session = [100.0, 130.0, "a.exe", "A"]
+        with backend.save_lock:
+            backend._close_session()
+            new_date = previous.date + dt.timedelta(days=1)
+            backend._switch_to_new_date(new_date, backend._load_day_data(new_date))
+        backend.save()
+        backend.timeline.close()
+
+        assert backend.timeline is not previous and not previous.writable
+        stored = timeline.TimelineStore(data_path, previous.date)
+        assert list(stored.between(0, 200)) == [{"start": 100.0, "end": 130.0, "exe": "a.exe", "title": "A"}]
+
+
+def test_backend_save_uses_tracked_date(backend_class, logger):
+    """测试过了零点、计时线程还未切换时，保存写入 main_data 所属日期的文件"""
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, enable_api=False)
+        backend.timeline.close()
+        yesterday = backend.current_date - dt.timedelta(days=1)
+        backend.current_date = yesterday
+        backend._add_app("a.exe", "A")
+        backend.save()
+
+        assert os.path.exists(os.path.join(data_path, yesterday.strftime("%Y-%m-%d") + ".json"))
+        assert not os.path.exists(os.path.join(data_path, dt.date.today().strftime("%Y-%m-%d") + ".json"))
+
+
+def test_backend_timeline_stores_cached_and_cross_midnight(backend_class, logger):
+    """测试已结束日期的时间线被缓存，跨过零点的会话能从后一天开始的查询中找到"""
+    with tempfile.TemporaryDirectory() as data_path:
+        backend = backend_class(logger, False, 0, data_path, enable_api=False)
+        backend.timeline.close()
+        yesterday = backend.current_date - dt.timedelta(days=1)
+        midnight = dt.datetime.combine(backend.current_date, dt.time()).timestamp()
+        store = timeline.TimelineStore(data_path, yesterday, writable=True)
+        store.append(midnight - 60, midnight + 60, "late.exe", "L")
+        store.close()
+
+        first = [s for s in backend._timeline_stores(midnight, midnight + 120) if s.date == yesterday]
+        second = [s for s in backend._timeline_stores(midnight, midnight + 120) if s.date == yesterday]
+        assert len(first) == 1 and first[0] is second[0]
+        assert [i["exe"] for i in first[0].between(midnight, midnight + 120)] == ["late.exe"]
+
+        backend.session = [midnight + 100, midnight + 110, "now.exe", "N"]
+        session, limit = backend._open_session(midnight, midnight + 120)
+        assert session["exe"] == "now.exe" and limit == midnight + 100
+        assert backend._open_session(midnight + 200, midnight + 300) == (None, midnight + 200)
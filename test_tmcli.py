@@ -0,0 +1,54 @@
+"""
+tmcli 命令行报表测试
+"""
+
+import datetime as dt
+import json
+import os
+import tempfile
+
+import tmcli
+
+
+def _write_day(data_path, date, day):
+    with open(os.path.join(data_path, date.strftime("%Y-%m-%d") + ".json"), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(day))
+
+
+def test_main_options_after_command(capsys):
+    """测试文档中的用法：-n 与 --by-category 写在子命令之后"""
+    with tempfile.TemporaryDirectory() as data_path:
+        config = os.path.join(data_path, "config.json")
+        with open(config, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"categories": [
+                {"category": "games", "type": "prefix", "pattern": "D:\\Games"},
+            ]}))
+        today = dt.datetime.today().date()
+        _write_day(data_path, today, {
+            "D:\\Games\\a.exe": {"totalTime": 120, "lastTime": 0.0},
+            "C:\\x\\code.exe": {"totalTime": 60, "lastTime": 0.0},
+        })
+        _write_day(data_path, today - dt.timedelta(days=1), {
+            "C:\\x\\code.exe": {"totalTime": 600, "lastTime": 0.0},
+        })
+        common = ['--config', config, '--data-path', data_path]
+
+        tmcli.main(common + ['today', '--by-category'])
+        out = capsys.readouterr().out
+        assert "games" in out and "uncategorized" in out
+
+        tmcli.main(common + ['top', '--days', '30', '-n', '1'])
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 2
+        assert "code.exe" in lines[0]
+
+
+def test_load_day_entries_not_object(capsys):
+    """测试合法 JSON 但不是对象的日数据文件按空数据处理"""
+    with tempfile.TemporaryDirectory() as data_path:
+        date = dt.date(2024, 1, 1)
+        _write_day(data_path, date, [1, 2, 3])
+
+        assert tmcli.load_day_entries(data_path, date) == {}
+        assert "顶层不是对象" in capsys.readouterr().err
+        assert tmcli.sum_days(data_path, date, date) == {}
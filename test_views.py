@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+测试应用排行视图
+"""
+
+import random
+
+import views
+
+
+def test_ranked_index_order():
+    """测试增量维护的顺序与完整排序一致"""
+    rng = random.Random(0)
+    data = {f"app{i}.exe": {"totalTime": rng.randrange(100)} for i in range(50)}
+    ranking = views.RankedIndex()
+    ranking.rebuild(data)
+
+    totals = {key: value["totalTime"] for key, value in data.items()}
+    for _ in range(2000):
+        key = f"app{rng.randrange(60)}.exe"
+        totals[key] = totals.get(key, 0) + 1
+        ranking.update(key, totals[key])
+
+    assert [totals[key] for key in ranking.order] == sorted(totals.values(), reverse=True)
+    assert all(ranking.position[key] == index for index, key in enumerate(ranking.order))
+
+
+def test_ranked_index_page():
+    """测试分页与过滤"""
+    ranking = views.RankedIndex()
+    ranking.rebuild({f"app{i}.exe": {"totalTime": i} for i in range(10)})
+
+    assert ranking.page(0, 3) == (["app9.exe", "app8.exe", "app7.exe"], True)
+    assert ranking.page(8, 3) == (["app1.exe", "app0.exe"], False)
+    even = lambda key: int(key[3:-4]) % 2 == 0
+    assert ranking.page(1, 2, even) == (["app6.exe", "app4.exe"], True)
+    assert views.format_time(3725) == "01:02:05"
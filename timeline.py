@@ -0,0 +1,181 @@
+import os
+import json
+import heapq
+import struct
+import datetime as dt
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Optional, Dict, Any, List, Iterator
+
+
+# 每条记录: 开始时间(double) 结束时间(double) 应用ID(uint32) 标题ID(uint32)，共 24 字节
+RECORD = struct.Struct('<ddII')
+
+
+def timeline_dir(data_path: str) -> str:
+    return os.path.join(data_path, "timeline")
+
+
+def store_paths(data_path: str, date: dt.date):
+    """一天的时间线文件: (记录文件 .bin, 名称文件 .names)"""
+    stem = os.path.join(timeline_dir(data_path), date.strftime("%Y-%m-%d"))
+    return stem + ".bin", stem + ".names"
+
+
+class TimelineStore(object):
+    """
+    一天的前台会话时间线
+
+    会话以 (start, end, app_id, title_id) 追加到 YYYY-MM-DD.bin，
+    exe 路径和窗口标题在 YYYY-MM-DD.names 中按出现顺序编号，只在首次出现时追加一行。
+
+    前台窗口同一时刻只有一个，会话互不重叠且按时间追加，
+    因此 starts 与 ends 两个数组都是有序的，用二分查找即可完成区间树的
+    点查询与范围查询（O(log n)），无需额外建树。
+    """
+
+    def __init__(self, data_path: str, date: dt.date, writable: bool = False):
+        self.date = date
+        self.writable = writable
+        folder = timeline_dir(data_path)
+        self.records_path, self.names_path = store_paths(data_path, date)
+
+        self.starts = array('d')
+        self.ends = array('d')
+        self.apps = array('I')
+        self.titles = array('I')
+        self.app_names: List[str] = []
+        self.title_names: List[str] = []
+        self._app_ids: Dict[str, int] = {}
+        self._title_ids: Dict[str, int] = {}
+        self._load()
+
+        self._records_file = None
+        self._names_file = None
+        if writable:
+            os.makedirs(folder, exist_ok=True)
+            self._records_file = open(self.records_path, 'ab')
+            self._names_file = open(self.names_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if os.path.exists(self.names_path):
+            with open(self.names_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        kind, name = json.loads(line)
+                    except ValueError:
+                        # 写入中断导致的不完整行
+                        break
+                    self._intern_loaded(kind, name)
+
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'rb') as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % RECORD.size
+            if usable != len(raw) and self.writable:
+                # 丢弃写入中断留下的半条记录，保证后续追加对齐
+                with open(self.records_path, 'r+b') as f:
+                    f.truncate(usable)
+            for start, end, app_id, title_id in RECORD.iter_unpack(raw[:usable]):
+                if app_id >= len(self.app_names) or title_id >= len(self.title_names):
+                    break
+                self.starts.append(start)
+                self.ends.append(end)
+                self.apps.append(app_id)
+                self.titles.append(title_id)
+
+    def _intern_loaded(self, kind: str, name: str):
+        if kind == "a":
+            self._app_ids[name] = len(self.app_names)
+            self.app_names.append(name)
+        else:
+            self._title_ids[name] = len(self.title_names)
+            self.title_names.append(name)
+
+    def _intern(self, kind: str, name: str) -> int:
+        ids = self._app_ids if kind == "a" else self._title_ids
+        index = ids.get(name)
+        if index is None:
+            self._intern_loaded(kind, name)
+            index = ids[name]
+            self._names_file.write(json.dumps([kind, name], ensure_ascii=False) + "\n")
+        return index
+
+    def append(self, start: float, end: float, exe_path: str, title: str):
+        """追加一段会话（必须晚于已有会话）"""
+        if end <= start:
+            return
+        if self.ends and start < self.ends[-1]:
+            start = self.ends[-1]
+            if end <= start:
+                return
+        app_id = self._intern("a", exe_path)
+        title_id = self._intern("t", title)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.apps.append(app_id)
+        self.titles.append(title_id)
+        self._records_file.write(RECORD.pack(start, end, app_id, title_id))
+
+    def flush(self):
+        if self.writable:
+            self._names_file.flush()
+            self._records_file.flush()
+
+    def close(self):
+        if self.writable:
+            self._names_file.close()
+            self._records_file.close()
+            self.writable = False
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _interval(self, index: int) -> Dict[str, Any]:
+        return {
+            "start": self.starts[index],
+            "end": self.ends[index],
+            "exe": self.app_names[self.apps[index]],
+            "title": self.title_names[self.titles[index]],
+        }
+
+    def _bounds(self, start: float, end: float):
+        # 第一个在 start 之后结束的会话，到第一个在 end 及之后开始的会话
+        return bisect_right(self.ends, start), bisect_left(self.starts, end)
+
+    def at(self, t: float) -> Optional[Dict[str, Any]]:
+        """返回 t 时刻的前台会话，没有则返回 None"""
+        index = bisect_right(self.starts, t) - 1
+        if index >= 0 and t < self.ends[index]:
+            return self._interval(index)
+        return None
+
+    def between(self, start: float, end: float) -> Iterator[Dict[str, Any]]:
+        """按时间顺序遍历与 [start, end) 相交的会话"""
+        lo, hi = self._bounds(start, end)
+        for index in range(lo, hi):
+            yield self._interval(index)
+
+    def count(self, start: float, end: float) -> int:
+        """与 [start, end) 相交的会话数"""
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def switch_count(self, start: float, end: float) -> int:
+        """[start, end) 内的会话切换次数"""
+        lo, hi = self._bounds(start, end)
+        return max(0, hi - lo - 1)
+
+    def longest(self, start: float, end: float, n: int = 10) -> List[Dict[str, Any]]:
+        """[start, end) 内最长的 n 段会话（按与区间相交部分的长度）"""
+        lo, hi = self._bounds(start, end)
+        indexes = heapq.nlargest(n, range(lo, hi),
+                                 key=lambda i: min(self.ends[i], end) - max(self.starts[i], start))
+        return [self._interval(index) for index in indexes]
+
+
+def dates_between(start: float, end: float) -> List[dt.date]:
+    """时间戳区间覆盖的所有日期（本地时间）"""
+    first = dt.datetime.fromtimestamp(start).date()
+    last = dt.datetime.fromtimestamp(max(start, end - 1e-6)).date()
+    return [first + dt.timedelta(days=i) for i in range((last - first).days + 1)]
@@ -0,0 +1,103 @@
+"""
+命令行报表工具
+
+直接读取数据目录中的日数据文件，不经过 HTTP，也不要求计时进程正在运行。
+
+用法:
+    python tmcli.py today                       # 今天各应用用时
+    python tmcli.py week                        # 最近 7 天每天的总用时与应用排行
+    python tmcli.py top --days 30 -n 20         # 最近 30 天用时最多的 20 个应用
+    python tmcli.py range 2024-01-01 2024-01-31 # 指定日期范围（含首尾）
+    python tmcli.py today --by-category         # 按配置中的分类规则汇总
+"""
+
+import argparse
+import datetime as dt
+import sys
+from typing import Dict, Optional
+
+import category
+import datafile
+from views import format_time, app_name
+
+
+def load_day_entries(data_path: str, date: dt.date) -> Dict[str, Dict]:
+    """读取一天的原始记录，文件不存在或无法读取时返回空字典，读取失败时在标准错误输出提示"""
+    return datafile.read_day(datafile.day_filename(data_path, date), lambda message: print(message, file=sys.stderr))
+
+
+def load_day(data_path: str, date: dt.date) -> Dict[str, int]:
+    """读取一天的数据，返回 {exe路径: 秒数}"""
+    return {key: datafile.entry_seconds(value) for key, value in load_day_entries(data_path, date).items()}
+
+
+def sum_days(data_path: str, first: dt.date, last: dt.date,
+             matcher: Optional[category.CategoryMatcher] = None) -> Dict[str, int]:
+    """汇总 [first, last] 内每天的数据；给出 matcher 时按分类汇总"""
+    totals: Dict[str, int] = {}
+    for i in range((last - first).days + 1):
+        for exe_path, value in load_day_entries(data_path, first + dt.timedelta(days=i)).items():
+            key = matcher.classify_entry(exe_path, value) if matcher else exe_path
+            totals[key] = totals.get(key, 0) + datafile.entry_seconds(value)
+    return totals
+
+
+def print_ranking(totals: Dict[str, int], limit: Optional[int] = None):
+    items = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    if limit:
+        items = items[:limit]
+    if not items:
+        print("暂无数据")
+        return
+    for name, seconds in items:
+        print(f"{format_time(seconds)}  {app_name(name)}")
+    print(f"{format_time(sum(totals.values()))}  合计")
+
+
+def parse_date(value: str) -> dt.date:
+    return dt.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time manager 命令行报表")
+    parser.add_argument('--config', default='./config.json', help="配置文件路径")
+    parser.add_argument('--data-path', help="数据目录，默认使用配置文件中的 data_path")
+    # 报表选项写在子命令之后（如 today --by-category），由各子命令共享
+    report_options = argparse.ArgumentParser(add_help=False)
+    report_options.add_argument('--by-category', action='store_true', help="按分类汇总")
+    report_options.add_argument('-n', type=int, default=None, help="最多显示的条目数")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('today', parents=[report_options], help="今天各应用用时")
+    commands.add_parser('week', parents=[report_options], help="最近 7 天的用时")
+    top = commands.add_parser('top', parents=[report_options], help="最近若干天用时最多的应用")
+    top.add_argument('--days', type=int, default=7)
+    date_range = commands.add_parser('range', parents=[report_options], help="指定日期范围的用时")
+    date_range.add_argument('start', type=parse_date)
+    date_range.add_argument('end', type=parse_date)
+    args = parser.parse_args(argv)
+
+    config = datafile.load_config(args.config)
+    data_path = args.data_path or config.get('data_path', './data')
+    matcher = category.CategoryMatcher(category.parse_rules(config.get('categories'))) if args.by_category else None
+    today = dt.datetime.today().date()
+
+    if args.command == 'today':
+        print_ranking(sum_days(data_path, today, today, matcher), args.n)
+    elif args.command == 'week':
+        first = today - dt.timedelta(days=6)
+        for i in range(7):
+            date = first + dt.timedelta(days=i)
+            print(f"{date.strftime('%Y-%m-%d')}  {format_time(sum(load_day(data_path, date).values()))}")
+        print()
+        print_ranking(sum_days(data_path, first, today, matcher), args.n or 10)
+    elif args.command == 'top':
+        first = today - dt.timedelta(days=max(1, args.days) - 1)
+        print_ranking(sum_days(data_path, first, today, matcher), args.n or 10)
+    elif args.command == 'range':
+        if args.end < args.start:
+            parser.error("结束日期早于开始日期")
+        print_ranking(sum_days(data_path, args.start, args.end, matcher), args.n)
+
+
+if __name__ == "__main__":
+    main()
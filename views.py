@@ -0,0 +1,87 @@
+import ntpath
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+
+def format_time(seconds: int) -> str:
+    """将秒数格式化为 HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class RankedIndex(object):
+    """
+    按用时降序排列的应用排行
+
+    计时每次只给一个应用加 1 秒，该应用在排行中最多向前移动到与它
+    相同用时的应用之前，因此用相邻交换维护顺序即可，通常只需 O(1)，
+    查询时直接切片，无需在每次请求时对全部应用重新排序。
+    """
+
+    def __init__(self):
+        self.order: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.totals: Dict[str, int] = {}
+
+    def rebuild(self, day_data: Dict[str, Dict[str, Any]]):
+        """加载一天的数据后整体重建一次"""
+        self.totals = {key: value['totalTime'] for key, value in day_data.items()}
+        self.order = sorted(self.totals, key=lambda key: self.totals[key], reverse=True)
+        self.position = {key: index for index, key in enumerate(self.order)}
+
+    def __len__(self):
+        return len(self.order)
+
+    def update(self, key: str, total: int):
+        """更新应用用时（只允许增加），新应用追加到末尾后再上移"""
+        index = self.position.get(key)
+        if index is None:
+            index = len(self.order)
+            self.order.append(key)
+            self.position[key] = index
+        self.totals[key] = total
+
+        order = self.order
+        position = self.position
+        totals = self.totals
+        while index > 0 and totals[order[index - 1]] < total:
+            previous = order[index - 1]
+            order[index] = previous
+            position[previous] = index
+            index -= 1
+        order[index] = key
+        position[key] = index
+
+    def page(self, offset: int = 0, limit: int = 20,
+             predicate: Optional[Callable[[str], bool]] = None) -> Tuple[List[str], bool]:
+        """
+        返回一页应用
+
+        Args:
+            offset: 跳过的条目数（过滤后）
+            limit: 本页条目数
+            predicate: 可选过滤条件，按排行顺序扫描直到凑满一页
+
+        Returns:
+            (List[str], bool): 本页的应用，以及之后是否还有更多
+        """
+        if predicate is None:
+            keys = self.order[offset:offset + limit + 1]
+            return keys[:limit], len(keys) > limit
+
+        keys = []
+        skipped = 0
+        for key in list(self.order):
+            if not predicate(key):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if len(keys) == limit:
+                return keys, True
+            keys.append(key)
+        return keys, False
+
+
+def app_name(exe_path: str) -> str:
+    """从 exe 路径得到显示名称"""
+    return ntpath.basename(exe_path) or exe_path